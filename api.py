@@ -0,0 +1,306 @@
+"""API HTTP locale (asyncio, sans dépendance) pour les scripts MAM / render farm.
+
+    python api.py --host 127.0.0.1 --port 8765
+
+    POST /batch   corps NDJSON (une ligne = un enregistrement, colonnes de naming.FIELDS)
+                  ou tableau JSON ; réponse NDJSON envoyée au fil de l'eau, une ligne par
+                  enregistrement : {"line", "filename", "segments"} ou {"line", "error"}
+    POST /pdf     {"program": "…", "entries": [{"filename", "description"} ou enregistrement]}
+                  → export list PDF (application/pdf)
+    GET  /health  {"status": "ok"}
+    GET  /metrics durées des requêtes /batch et /pdf (histogrammes, texte Prometheus)
+
+Les enregistrements sont lus, convertis et renvoyés par paquets : un lot de 100k lignes ne
+passe jamais entier en mémoire et n'immobilise pas la boucle pour les autres connexions.
+Une ligne NDJSON illisible donne une ligne d'erreur ; une ligne de plus de MAX_LINE octets
+arrête le lot (413 si c'est la première).
+Le rendu PDF (ReportLab, bloquant) tourne dans un thread à part.
+"""
+import argparse, asyncio, json, sys
+from functools import partial
+
+import metrics
+from cli import generate, row_to_args, text_row
+from naming import build_name
+
+DEFAULT_HOST = "127.0.0.1"
+DEFAULT_PORT = 8765
+# Lignes de résultat par morceau de réponse (puis attente du client, drain)
+BATCH_FLUSH = 500
+MAX_HEAD = 64 * 1024
+# Corps non streamés (/pdf, tableau JSON)
+MAX_BODY = 64 * 1024 * 1024
+# Ligne NDJSON (un enregistrement) : au-delà, le corps est refusé
+MAX_LINE = 1024 * 1024
+READ_SIZE = 64 * 1024
+
+# Un seul encodeur : json.dumps avec des options en recrée un à chaque appel
+_encode = json.JSONEncoder(ensure_ascii=False).encode
+
+REASONS = {200: "OK", 400: "Bad Request", 404: "Not Found", 405: "Method Not Allowed",
+           413: "Payload Too Large", 500: "Internal Server Error"}
+
+
+class HttpError(Exception):
+    def __init__(self, status, message):
+        super().__init__(message)
+        self.status = status
+
+
+# --- HTTP/1.1 minimal (partagé avec bench/loadtest.py) ---
+async def read_head(reader):
+    """(ligne de départ, {en-tête en minuscules: valeur}) ; None si la connexion est fermée."""
+    try:
+        raw = await reader.readuntil(b"\r\n\r\n")
+    except asyncio.IncompleteReadError as exc:
+        if exc.partial.strip():
+            raise HttpError(400, "incomplete request head") from None
+        return None
+    except asyncio.LimitOverrunError:
+        raise HttpError(413, "request head too large") from None
+    start, *lines = raw.decode("latin-1").split("\r\n")
+    headers = {}
+    for line in lines:
+        if line:
+            name, _, value = line.partition(":")
+            headers[name.strip().lower()] = value.strip()
+    return start, headers
+
+async def body_chunks(reader, headers):
+    """Itère sur le corps (Content-Length ou Transfer-Encoding: chunked) par morceaux."""
+    if headers.get("transfer-encoding", "").lower() == "chunked":
+        while True:
+            size = int((await reader.readline()).split(b";", 1)[0], 16)
+            if size == 0:
+                await reader.readline()  # ligne vide finale (pas de trailers)
+                return
+            yield await reader.readexactly(size)
+            await reader.readexactly(2)
+    else:
+        remaining = int(headers.get("content-length") or 0)
+        while remaining:
+            chunk = await reader.read(min(remaining, READ_SIZE))
+            if not chunk:
+                raise asyncio.IncompleteReadError(b"", remaining)
+            remaining -= len(chunk)
+            yield chunk
+
+async def read_body(reader, headers, limit=MAX_BODY):
+    body = bytearray()
+    async for chunk in body_chunks(reader, headers):
+        body += chunk
+        if len(body) > limit:
+            raise HttpError(413, f"body larger than {limit} bytes")
+    return bytes(body)
+
+async def ndjson_records(reader, headers, max_line=MAX_LINE):
+    """Enregistrements d'un corps NDJSON, décodés au fil de la lecture.
+
+    Une ligne illisible est rendue sous forme de ValueError (signalée par generate, comme cli.read_rows).
+    """
+    pending = b""
+    async for chunk in body_chunks(reader, headers):
+        *lines, pending = (pending + chunk).split(b"\n")
+        if len(pending) > max_line or any(len(line) > max_line for line in lines):
+            raise HttpError(413, f"NDJSON line larger than {max_line} bytes")
+        for line in lines:
+            if line.strip():
+                yield _json_line(line)
+    if pending.strip():
+        yield _json_line(pending)
+
+def _json_line(line):
+    try:
+        return json.loads(line)
+    except ValueError as exc:
+        return ValueError(f"invalid JSON: {exc}")
+
+def head_bytes(status, headers):
+    lines = [f"HTTP/1.1 {status} {REASONS.get(status, '')}"]
+    lines += [f"{k}: {v}" for k, v in headers.items()]
+    return ("\r\n".join(lines) + "\r\n\r\n").encode("latin-1")
+
+def send_json(writer, status, obj, keep_alive=True):
+    body = _encode(obj).encode("utf-8")
+    writer.write(head_bytes(status, {"Content-Type": "application/json", "Content-Length": len(body),
+                                     "Connection": "keep-alive" if keep_alive else "close"}))
+    writer.write(body)
+
+def write_chunk(writer, data):
+    writer.write(b"%x\r\n%s\r\n" % (len(data), data))
+
+
+# --- Points d'entrée ---
+def _result_line(lineno, filename, result):
+    if filename is None:
+        obj = {"line": lineno, "error": result}
+    else:
+        obj = {"line": lineno, "filename": filename, "segments": result}
+    return _encode(obj) + "\n"
+
+async def _array_records(reader, headers):
+    try:
+        records = json.loads(await read_body(reader, headers))
+    except ValueError as exc:
+        raise HttpError(400, f"invalid JSON: {exc}") from None
+    if not isinstance(records, list):
+        raise HttpError(400, "expected a JSON array of records")
+    for r in records:
+        yield r
+
+_END = object()
+
+async def _prepend(first, records):
+    yield first
+    async for r in records:
+        yield r
+
+async def handle_batch(reader, writer, headers):
+    """Réponse NDJSON en Transfer-Encoding: chunked, un morceau toutes les BATCH_FLUSH lignes."""
+    is_array = headers.get("content-type", "").split(";")[0].strip() == "application/json"
+    records = _array_records(reader, headers) if is_array else ndjson_records(reader, headers)
+    # Premier enregistrement lu avant les en-têtes : un corps refusé d'emblée garde son statut (400, 413)
+    first = await anext(records, _END)
+    if first is not _END:
+        records = _prepend(first, records)
+    writer.write(head_bytes(200, {"Content-Type": "application/x-ndjson", "Transfer-Encoding": "chunked",
+                                  "Connection": "keep-alive"}))
+    out, lineno = [], 0
+    try:
+        async for row in records:
+            lineno += 1
+            out.append(_result_line(lineno, *next(generate([row]))[1:]))
+            if len(out) >= BATCH_FLUSH:
+                write_chunk(writer, "".join(out).encode("utf-8"))
+                out.clear()
+                await writer.drain()
+    except (ValueError, HttpError) as exc:
+        # En-têtes déjà partis : l'erreur devient la dernière ligne du flux
+        out.append(json.dumps({"line": lineno + 1, "error": f"invalid body: {exc}"}) + "\n")
+        write_chunk(writer, "".join(out).encode("utf-8"))
+        writer.write(b"0\r\n\r\n")
+        return False  # le reste du corps n'a pas été lu : connexion fermée
+    if out:
+        write_chunk(writer, "".join(out).encode("utf-8"))
+    writer.write(b"0\r\n\r\n")
+    return True
+
+def _pdf_rows(entries):
+    """Entrées de la requête → dicts de pdf_export ; un enregistrement sans filename est d'abord nommé."""
+    rows = []
+    for n, e in enumerate(entries, start=1):
+        try:
+            e = text_row(e)
+        except ValueError:
+            raise HttpError(400, f"entry {n}: expected a JSON object") from None
+        filename = e.get("filename", "").strip()
+        if not filename:
+            try:
+                filename, _ = build_name(*row_to_args(e))
+            except ValueError as exc:
+                raise HttpError(400, f"entry {n}: {exc}") from None
+        rows.append({"id": e.get("id") or f"{n:02d}", "filename": filename,
+                     "description": e.get("description", ""), "checksum": e.get("checksum", "")})
+    return rows
+
+async def handle_pdf(reader, writer, headers):
+    try:
+        payload = json.loads(await read_body(reader, headers))
+    except ValueError as exc:
+        raise HttpError(400, f"invalid JSON: {exc}") from None
+    if not isinstance(payload, dict) or not isinstance(payload.get("entries"), list):
+        raise HttpError(400, 'expected {"program": …, "entries": […]}')
+    rows = _pdf_rows(payload["entries"])
+    from pdf_export import pdf_file  # ReportLab chargé au premier export seulement
+    program = str(payload.get("program") or "PROGRAM")
+    loop = asyncio.get_running_loop()
+    out, fname = await loop.run_in_executor(None, partial(pdf_file, rows, program))
+    with out:
+        size = out.seek(0, 2)
+        out.seek(0)
+        writer.write(head_bytes(200, {"Content-Type": "application/pdf", "Content-Length": size,
+                                      "Content-Disposition": f'attachment; filename="{fname}"',
+                                      "Connection": "keep-alive"}))
+        while data := out.read(READ_SIZE):
+            writer.write(data)
+            await writer.drain()
+    return True
+
+def send_metrics(writer):
+    body = metrics.render_prometheus().encode("utf-8")
+    writer.write(head_bytes(200, {"Content-Type": "text/plain; version=0.0.4; charset=utf-8",
+                                  "Content-Length": len(body), "Connection": "keep-alive"}))
+    writer.write(body)
+
+async def dispatch(method, path, reader, writer, headers):
+    """Traite une requête ; renvoie False si la connexion doit être fermée ensuite."""
+    path = path.split("?", 1)[0]
+    routes = {"/batch": ("POST", handle_batch), "/pdf": ("POST", handle_pdf)}
+    if path == "/health":
+        send_json(writer, 200, {"status": "ok"})
+        return True
+    if path == "/metrics":
+        send_metrics(writer)
+        return True
+    if path not in routes:
+        raise HttpError(404, f"no such endpoint: {path}")
+    allowed, handler = routes[path]
+    if method != allowed:
+        raise HttpError(405, f"{path} expects {allowed}")
+    # Durée de la requête entière, lecture du corps et envoi de la réponse compris
+    with metrics.timer("api" + path):
+        return await handler(reader, writer, headers)
+
+async def handle_connection(reader, writer):
+    try:
+        while True:
+            headers = {}
+            try:
+                head = await read_head(reader)
+                if head is None:
+                    break
+                start, headers = head
+                method, path, _ = start.split(" ", 2)
+                keep = await dispatch(method, path, reader, writer, headers)
+            except HttpError as exc:
+                # Corps éventuellement non lu : on répond puis on ferme
+                send_json(writer, exc.status, {"error": str(exc)}, keep_alive=False)
+                keep = False
+            except ValueError:
+                send_json(writer, 400, {"error": "malformed request"}, keep_alive=False)
+                keep = False
+            except (ConnectionError, asyncio.IncompleteReadError):
+                raise
+            except Exception as exc:  # erreur de rendu… : la connexion est fermée après la réponse
+                send_json(writer, 500, {"error": f"{type(exc).__name__}: {exc}"}, keep_alive=False)
+                keep = False
+            await writer.drain()
+            if not keep or headers.get("connection", "").lower() == "close":
+                break
+    except (ConnectionError, asyncio.IncompleteReadError):
+        pass
+    finally:
+        writer.close()
+
+async def serve(host=DEFAULT_HOST, port=DEFAULT_PORT):
+    server = await asyncio.start_server(handle_connection, host, port, limit=MAX_HEAD)
+    addr = server.sockets[0].getsockname()
+    print(f"listening on http://{addr[0]}:{addr[1]}", file=sys.stderr, flush=True)
+    async with server:
+        await server.serve_forever()
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="Clean Masters Filename Generator — HTTP batch API")
+    ap.add_argument("--host", default=DEFAULT_HOST, help="adresse d'écoute (défaut : localhost seulement)")
+    ap.add_argument("--port", type=int, default=DEFAULT_PORT)
+    args = ap.parse_args(argv)
+    try:
+        asyncio.run(serve(args.host, args.port))
+    except KeyboardInterrupt:
+        pass
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
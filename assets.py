@@ -0,0 +1,57 @@
+"""Images de l'app (logo, icône de fichier), préparées une fois par processus.
+
+Le logo source est bien plus grand que sa taille d'affichage (en-tête de l'app, en-tête
+du PDF) : il est réduit (Pillow) avant d'être encodé ou embarqué. Chaque résultat est
+gardé en mémoire et recalculé seulement si le fichier change (mtime).
+"""
+import base64, os, threading
+from io import BytesIO
+
+from naming import BASE_DIR
+
+LOGO_PATH = str(BASE_DIR / "logo.png")
+ICON_PATH = str(BASE_DIR / "file-icon.png")
+
+_cache = {}  # (fonction, chemin, taille max) -> (mtime_ns, résultat)
+_lock = threading.RLock()
+
+
+def _cached(kind, path, max_px, build):
+    try:
+        mtime = os.stat(path).st_mtime_ns
+    except OSError:
+        return None
+    key = (kind, path, max_px)
+    hit = _cache.get(key)
+    if hit and hit[0] == mtime:
+        return hit[1]
+    with _lock:
+        value = build()
+        _cache[key] = (mtime, value)
+    return value
+
+def _read_png(path, max_px):
+    with open(path, "rb") as f:
+        data = f.read()
+    if not max_px:
+        return data
+    try:
+        from PIL import Image  # chargé seulement pour réduire une image (premier appel)
+    except ImportError:  # image utilisée telle quelle
+        return data
+    with Image.open(BytesIO(data)) as im:
+        if max(im.size) <= max_px:
+            return data
+        im.thumbnail((max_px, max_px), Image.LANCZOS)
+        out = BytesIO()
+        im.save(out, "PNG")
+    return out.getvalue()
+
+def png_bytes(path, max_px=None):
+    """PNG de path, réduit pour tenir dans max_px × max_px (si Pillow est installé) ; None si absent."""
+    return _cached("png", path, max_px, lambda: _read_png(path, max_px))
+
+def png_data_uri(path, max_px=None):
+    """URI data:image/png;base64 de png_bytes, pour du HTML inline ; None si le fichier est absent."""
+    return _cached("uri", path, max_px,
+                   lambda: "data:image/png;base64," + base64.b64encode(png_bytes(path, max_px)).decode())
@@ -0,0 +1,136 @@
+"""Microbenchmark : noms/seconde, ancienne paire build_filename + build_typed_segments
+contre le builder compilé en une passe (naming.build_name), à froid puis avec les caches LRU chauds.
+
+À froid : lignes toutes différentes dans chaque champ mis en cache (programme, version,
+résolution, codec audio), donc aucun hit. À chaud : lignes tirées d'un petit pool, comme
+une vraie livraison, après une première passe. L'ancienne implémentation est mesurée sur
+les mêmes lignes dans les deux cas.
+
+    python bench/bench_naming.py [nombre_de_lignes]
+"""
+import random, re, sys, time
+from datetime import date, datetime
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+from naming import (LANGUAGES, SUBTITLES, CADENCES, AUDIO_FORMATS, load_config, build_name,
+                    cache_clear, cache_stats)
+
+
+# --- Implémentation d'origine, gardée comme référence ---
+def legacy_sanitize(text):
+    if not text: return ""
+    tmp = re.sub(r"[^A-Za-z0-9\s]+", "", text)
+    return re.sub(r"_+", "_", tmp.strip().replace(" ", "_"))
+
+def legacy_build_filename(program, version, dt, language, subtitles, fileformat, videoformat,
+                          videoaspect_raw, videores, cadence, audioformat, audiocodec):
+    program = legacy_sanitize(program)
+    version = legacy_sanitize(version)
+    audiocodec = legacy_sanitize(audiocodec)
+    videores = legacy_sanitize(videores)
+    date_code = dt.strftime("%y%m%d") if isinstance(dt, date) else datetime.now().strftime("%y%m%d")
+    videoaspect = re.sub(r"[.,]", "", videoaspect_raw or "")
+    if subtitles == "NOSUB":
+        sub_seg = "NOSUB"
+    elif subtitles:
+        sub_seg = f"ST{subtitles}"
+    else:
+        sub_seg = ""
+    segments = [program]
+    if version: segments.append(version)
+    lang_seg = f"{language}-{sub_seg}" if sub_seg else language
+    segments.append(lang_seg)
+    segments += [fileformat, videoformat, videoaspect, videores, cadence, audioformat, audiocodec, date_code]
+    return "_".join(seg for seg in segments if seg)
+
+def legacy_build_typed_segments(program, version, form_date, language, subtitles,
+                                fileformat, videoformat, videoaspect, videores,
+                                cadence, audioformat, audiocodec):
+    prog = legacy_sanitize(program)
+    vers = legacy_sanitize(version)
+    date_code = form_date.strftime("%y%m%d")
+    videoaspect_clean = re.sub(r"[.,]", "", videoaspect or "")
+    videores_clean = legacy_sanitize(videores)
+    audiocodec_clean = legacy_sanitize(audiocodec)
+    if subtitles == "NOSUB":
+        sub_seg = "NOSUB"
+    elif subtitles:
+        sub_seg = f"ST{subtitles}"
+    else:
+        sub_seg = ""
+    lang_seg = f"{language}-{sub_seg}" if sub_seg else language
+    typed = [("PROGRAM", prog)]
+    if vers:
+        typed.append(("VERSION", vers))
+    typed += [("LANG_SUB", lang_seg), ("FILE_FORMAT", fileformat), ("VIDEO_FORMAT", videoformat)]
+    if videoaspect_clean:
+        typed.append(("VIDEO_ASPECT", videoaspect_clean))
+    if videores_clean:
+        typed.append(("RESOLUTION", videores_clean))
+    if cadence:
+        typed.append(("CADENCE", cadence))
+    typed.append(("AUDIO_FORMAT", audioformat))
+    if audiocodec_clean:
+        typed.append(("AUDIO_CODEC", audiocodec_clean))
+    typed.append(("DATE", date_code))
+    return typed
+
+
+def synthetic_rows(n, distinct=2000, seed=0):
+    """n lignes tirées d'un pool de `distinct` combinaisons, comme dans une vraie livraison."""
+    rnd = random.Random(seed)
+    file_formats, video_formats = load_config()
+    pool = []
+    for i in range(min(n, distinct)):
+        pool.append((
+            f"Program {i % 50}", rnd.choice(["", "V1", "VF v2", "DIR CUT"]), date(2024, 1 + i % 12, 1 + i % 28),
+            rnd.choice(LANGUAGES)[0], rnd.choice(SUBTITLES)[0], rnd.choice(file_formats), rnd.choice(video_formats),
+            rnd.choice(["", "1.85", "2,39", "1.78"]), rnd.choice(["", "1920x1080", "3840x2160"]),
+            rnd.choice(CADENCES), rnd.choice(AUDIO_FORMATS)[0], rnd.choice(["", "PCM 24", "AAC"]),
+        ))
+    return [rnd.choice(pool) for _ in range(n)]
+
+def unique_rows(n, seed=0):
+    """n lignes dont chaque champ passé par sanitize est unique : aucun hit de cache possible."""
+    return [(f"Program {i}", f"V{i}", *r[2:8], f"{1920 + i}x1080", r[9], r[10], f"PCM {i}")
+            for i, r in enumerate(synthetic_rows(n, distinct=n, seed=seed))]
+
+def run(label, fn, rows):
+    t0 = time.perf_counter()
+    for r in rows:
+        fn(*r)
+    dt = time.perf_counter() - t0
+    print(f"{label:<32} {len(rows) / dt:>12,.0f} names/s")
+    return dt
+
+def legacy_pair(*r):
+    return legacy_build_filename(*r), legacy_build_typed_segments(*r)
+
+def main():
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 200_000
+    rows, unique = synthetic_rows(n), unique_rows(n)
+    # Les deux implémentations doivent produire exactement le même résultat
+    for r in rows[:1000] + unique[:1000]:
+        name, typed = build_name(*r)
+        assert (name, list(typed)) == legacy_pair(*r), r
+
+    base_cold = run("legacy, unique rows", legacy_pair, unique)
+    cache_clear()
+    cold = run("compiled nomenclature (cold)", build_name, unique)
+    print_cache_stats()
+    base_warm = run("legacy, pooled rows", legacy_pair, rows)
+    cache_clear()
+    build_all = lambda rs: [build_name(*r) for r in rs]
+    build_all(rows)  # remplit les caches
+    warm = run("compiled nomenclature (warm)", build_name, rows)
+    print_cache_stats()
+    print(f"speedup x{base_cold / cold:.2f} cold, x{base_warm / warm:.2f} warm")
+
+def print_cache_stats():
+    for name, info in cache_stats().items():
+        print(f"  cache {name}: {info.hits} hits, {info.misses} misses, {info.currsize}/{info.maxsize}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,52 @@
+"""Benchmark du rendu PDF : temps et pic de RSS par taille de liste.
+
+    python bench/bench_pdf.py [--workers N] [tailles…]      (défaut : 1000 10000 100000)
+
+--workers N répartit les pages sur N processus (N=1 : rendu séquentiel).
+
+Chaque taille tourne dans un processus séparé pour que le pic de RSS soit propre.
+"""
+import json, resource, subprocess, sys, time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+
+def synthetic_entries(n):
+    return [{
+        "id": f"{i + 1:02d}",
+        "filename": f"Program_{i % 50}_V{i % 3}_FR-STEN_ProRes_422HQ_UHD_185_3840x2160_25_51_PCM_24_240101",
+        "description": "Master PAD" if i % 3 else "",
+    } for i in range(n)]
+
+def child(n, workers):
+    from pdf_export import pdf_file
+    entries = synthetic_entries(n)
+    t0 = time.perf_counter()
+    out, _ = pdf_file(entries, "Bench", workers=workers)
+    dt = time.perf_counter() - t0
+    out.seek(0, 2)
+    size = out.tell()
+    out.close()
+    # ru_maxrss est en Ko sous Linux ; les processus de rendu comptent à part
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+    peak = max(peak, resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss / 1024)
+    print(json.dumps({"entries": n, "seconds": dt, "peak_rss_mb": peak, "pdf_mb": size / 1e6}))
+
+def main(sizes, workers):
+    print(f"workers: {workers}")
+    print(f"{'entries':>8} {'time (s)':>9} {'entries/s':>10} {'peak RSS (MB)':>14} {'PDF (MB)':>9}")
+    for n in sizes:
+        res = json.loads(subprocess.check_output([sys.executable, __file__, "--child", str(n), str(workers)]))
+        print(f"{n:>8} {res['seconds']:>9.2f} {n / res['seconds']:>10,.0f} {res['peak_rss_mb']:>14.1f} {res['pdf_mb']:>9.2f}")
+
+
+if __name__ == "__main__":
+    args = sys.argv[1:]
+    if args[:1] == ["--child"]:
+        child(int(args[1]), int(args[2]))
+    else:
+        workers = 1
+        if args[:1] == ["--workers"]:
+            workers, args = int(args[1]), args[2:]
+        main([int(a) for a in args] or [1000, 10000, 100000], workers)
@@ -0,0 +1,62 @@
+"""Benchmark du renommage en masse : plan, application journalisée et rollback.
+
+    python bench/bench_rename.py [--dirs D] [tailles…]      (défaut : 10000 100000)
+
+Les fichiers (vides) sont créés dans un dossier temporaire, répartis sur D dossiers.
+Un second cycle renomme en chaîne (A→B, B→C) pour mesurer le passage par des noms
+temporaires.
+"""
+import os, shutil, sys, tempfile, time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from rename import apply, plan, rollback
+
+
+def make_tree(root, n, dirs):
+    pairs = []
+    for d in range(dirs):
+        os.makedirs(os.path.join(root, f"d{d}"))
+    for i in range(n):
+        src = os.path.join(root, f"d{i % dirs}", f"A{i:06d}.mov")
+        open(src, "wb").close()
+        pairs.append((src, f"Program_{i % 50}_V{i}_FR-STEN_ProRes_422HQ_UHD_185_3840x2160_25_51_PCM_240101"))
+    return pairs
+
+def timed(fn, *args):
+    t0 = time.perf_counter()
+    res = fn(*args)
+    return res, time.perf_counter() - t0
+
+def main(sizes, dirs):
+    print(f"{'files':>8} {'plan (s)':>9} {'apply (s)':>10} {'files/s':>9} {'rollback (s)':>13} {'chained (s)':>12}")
+    for n in sizes:
+        root = tempfile.mkdtemp(prefix="bench_rename_")
+        try:
+            pairs = make_tree(root, n, dirs)
+            (ops, problems), t_plan = timed(plan, pairs)
+            assert not problems, problems[:3]
+            _, t_apply = timed(apply, ops, os.path.join(root, "run1.journal"))
+            restored, t_back = timed(rollback, os.path.join(root, "run1.journal"))
+            assert restored == n, restored
+            # Rotation dans chaque dossier : chaque fichier prend le nom du suivant
+            chain = []
+            for d in range(dirs):
+                srcs = pairs[d::dirs]
+                chain += [(src, os.path.basename(srcs[(i + 1) % len(srcs)][0])) for i, (src, _) in enumerate(srcs)]
+            ops, problems = plan(chain)
+            assert not problems, problems[:3]
+            _, t_chain = timed(apply, ops, os.path.join(root, "run2.journal"))
+            print(f"{n:>8} {t_plan:>9.2f} {t_apply:>10.2f} {n / t_apply:>9,.0f} {t_back:>13.2f} {t_chain:>12.2f}")
+        finally:
+            shutil.rmtree(root)
+
+
+if __name__ == "__main__":
+    args = sys.argv[1:]
+    dirs = 10
+    if args[:1] == ["--dirs"]:
+        dirs = int(args[1])
+        args = args[2:]
+    main([int(a) for a in args] or [10000, 100000], dirs)
@@ -0,0 +1,89 @@
+"""Temps de démarrage et de rerun de l'app Streamlit (main-st.py), via streamlit.testing.
+
+    python bench/bench_startup.py [--runs 20] [--entries 1000] [--against REV]
+
+- cold : premier run du script dans un processus neuf (imports de l'app compris,
+  pas celui de Streamlit lui-même) ;
+- rerun : moyenne et médiane des reruns suivants, liste vide puis avec --entries entrées ;
+- reportlab : chargé ou non à la fin (il ne devrait l'être qu'à l'export PDF).
+
+--against REV mesure aussi l'arbre d'une autre révision git (extrait dans un dossier
+temporaire) pour un avant / après.
+"""
+import argparse, json, statistics, subprocess, sys, tempfile, time
+from datetime import date
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+
+
+def child(tree, runs, n_entries):
+    from streamlit.testing.v1 import AppTest  # import de Streamlit hors mesure
+    sys.path.insert(0, tree)
+    at = AppTest.from_file(str(Path(tree) / "main-st.py"), default_timeout=600)
+    t0 = time.perf_counter()
+    at.run()
+    cold = time.perf_counter() - t0
+    assert not at.exception, at.exception
+
+    def reruns():
+        times = []
+        for _ in range(runs):
+            t = time.perf_counter()
+            at.run()
+            times.append(time.perf_counter() - t)
+        return times
+
+    empty = reruns()
+    from naming import build_name
+    entries = at.session_state["entries"]
+    for i in range(n_entries):
+        fname, typed = build_name(f"Program {i}", "V1", date(2024, 5, 1), "FR", "NOSUB", "DCP", "HD",
+                                  "", "", "25", "51", "")
+        entries.add(fname, typed, "")
+    full = reruns()
+    assert not at.exception, at.exception
+    print(json.dumps({"cold": cold, "empty": empty, "full": full, "reportlab": "reportlab" in sys.modules}))
+
+def measure(tree, runs, n_entries):
+    out = subprocess.check_output([sys.executable, __file__, "--child", str(tree), str(runs), str(n_entries)],
+                                  cwd=tree)
+    return json.loads(out.splitlines()[-1])
+
+def report(label, res, n_entries):
+    ms = lambda v: f"{v * 1000:>8.1f}"
+    print(f"{label:<12} {ms(res['cold'])} {ms(statistics.mean(res['empty']))} {ms(statistics.median(res['empty']))} "
+          f"{ms(statistics.mean(res['full']))} {ms(statistics.median(res['full']))} "
+          f"{'yes' if res['reportlab'] else 'no':>9}")
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="Startup / rerun timing of main-st.py")
+    ap.add_argument("--runs", type=int, default=20, help="reruns mesurés par configuration")
+    ap.add_argument("--entries", type=int, default=1000, help="taille de la liste pour la 2e série de reruns")
+    ap.add_argument("--against", help="révision git à comparer (ex. HEAD~1)")
+    args = ap.parse_args(argv)
+
+    trees = []
+    tmp = None
+    if args.against:
+        tmp = tempfile.TemporaryDirectory(prefix="bench_startup_")
+        subprocess.run(["git", "-C", str(ROOT), "worktree", "add", "--detach", tmp.name, args.against],
+                       check=True, capture_output=True)
+        trees.append((args.against, tmp.name))
+    trees.append(("working tree", str(ROOT)))
+    n = args.entries
+    print(f"{'':<12} {'cold':>8} {'rerun':>8} {'p50':>8} {f'rerun {n}':>8} {'p50':>8} {'reportlab':>9}   (ms)")
+    try:
+        for label, tree in trees:
+            report(label, measure(tree, args.runs, n), n)
+    finally:
+        if tmp:
+            subprocess.run(["git", "-C", str(ROOT), "worktree", "remove", "--force", tmp.name], capture_output=True)
+            tmp.cleanup()
+
+
+if __name__ == "__main__":
+    if sys.argv[1:2] == ["--child"]:
+        child(sys.argv[2], int(sys.argv[3]), int(sys.argv[4]))
+    else:
+        sys.exit(main())
@@ -0,0 +1,207 @@
+"""Suite de benchmarks des chemins chauds (nommage, liste, export PDF) et détection de régressions.
+
+    python bench/bench_suite.py                      compare à bench/baseline.json (code 1 si régression)
+    python bench/bench_suite.py --save               mesure et (ré)écrit la référence
+    python bench/bench_suite.py --cases sanitize,pdf_bytes --sizes 10,1000
+
+Cas mesurés, sur 10 à 100 000 entrées synthétiques (bench_naming.synthetic_rows : LANGUAGES,
+SUBTITLES, CADENCES, AUDIO_FORMATS et les listes de config.ini, graine fixe) :
+
+- sanitize, build_filename, build_typed_segments : caches de nommage vidés à chaque passe ;
+- entries_payload : lignes du composant de la liste (entries_list.entry_rows) sérialisées en
+  JSON comme Streamlit les envoie ; le nom coloré par segment est dessiné dans le navigateur ;
+- pdf_bytes : rendu complet de l'export, séquentiel (workers=1) pour un pic mémoire mesurable.
+
+Débit : médiane de --repeat passes (plus stable que la meilleure sur une machine partagée,
+dont la vitesse varie par à-coups) ; une passe trop courte (petites tailles) est répétée en
+boucle jusqu'à MIN_TIME. Pic mémoire : tracemalloc, pendant une passe séparée (hors données
+d'entrée). Une régression est un débit plus bas de plus de --max-slowdown, ou un pic plus haut
+de plus de --max-memory-growth (et d'au moins MEMORY_SLACK_KB) que la référence.
+La référence dépend de la machine : l'enregistrer (--save) sur le poste qui compare.
+"""
+import argparse, gc, json, os, platform, statistics, sys, time, tracemalloc
+from datetime import datetime
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+from bench_naming import synthetic_rows
+from entry_store import EntryStore
+from naming import build_filename, build_name, build_typed_segments, cache_clear, sanitize
+
+BASELINE_PATH = Path(__file__).resolve().parent / "baseline.json"
+SIZES = (10, 100, 1000, 10_000, 100_000)
+# Durée minimale d'une mesure (la passe est répétée en boucle en dessous)
+MIN_TIME = 0.1
+# Au-delà, plus de répétition pour ce cas et cette taille
+TIME_BUDGET = 5.0
+# Écart de pic mémoire ignoré quelle que soit la proportion (petites tailles)
+MEMORY_SLACK_KB = 256
+
+
+# --- Cas : setup(n) -> passe sans argument (données préparées hors mesure) ---
+def _store(n):
+    store = EntryStore()
+    store.extend((*build_name(*r), "Master PAD" if i % 3 else "") for i, r in enumerate(synthetic_rows(n)))
+    return store
+
+def case_sanitize(n):
+    texts = [f"{r[0]} {r[1]} ({r[8]})" for r in synthetic_rows(n)]
+    def run():
+        cache_clear()
+        for t in texts:
+            sanitize(t)
+    return run
+
+def _naming_case(fn):
+    def setup(n):
+        rows = synthetic_rows(n)
+        def run():
+            cache_clear()
+            for r in rows:
+                fn(*r)
+        return run
+    return setup
+
+def case_entries_payload(n):
+    from entries_list import entry_rows, TYPE_COLORS
+    store = _store(n)
+    encode = json.JSONEncoder(separators=(",", ":")).encode
+    return lambda: encode({"entries": entry_rows(store), "colors": TYPE_COLORS})
+
+def case_pdf_bytes(n):
+    from pdf_export import pdf_bytes  # ReportLab chargé hors mesure
+    rows = _store(n).export_rows()
+    return lambda: pdf_bytes(rows, "Bench", workers=1)
+
+CASES = {
+    "sanitize": case_sanitize,
+    "build_filename": _naming_case(build_filename),
+    "build_typed_segments": _naming_case(build_typed_segments),
+    "entries_payload": case_entries_payload,
+    "pdf_bytes": case_pdf_bytes,
+}
+
+
+# --- Mesure ---
+def throughput(run, n, repeat):
+    """(entrées par seconde, secondes par passe) : médiane des passes, chacune bouclée jusqu'à MIN_TIME."""
+    times, spent = [], 0.0
+    for _ in range(repeat):
+        loops, t0 = 0, time.perf_counter()
+        while True:
+            run()
+            loops += 1
+            elapsed = time.perf_counter() - t0
+            if elapsed >= MIN_TIME:
+                break
+        times.append(elapsed / loops)
+        spent += elapsed
+        if spent >= TIME_BUDGET:
+            break
+    seconds = statistics.median(times)
+    return n / seconds, seconds
+
+def peak_memory_kb(run):
+    gc.collect()
+    tracemalloc.start()
+    try:
+        run()
+        return tracemalloc.get_traced_memory()[1] / 1024
+    finally:
+        tracemalloc.stop()
+
+def measure(case, n, repeat):
+    run = CASES[case](n)
+    run()  # chauffe (imports paresseux, premier accès aux caches de config)
+    per_s, seconds = throughput(run, n, repeat)
+    return {"items_per_s": round(per_s, 1), "seconds": round(seconds, 6), "peak_kb": round(peak_memory_kb(run), 1)}
+
+
+# --- Référence ---
+def environment():
+    return {"python": platform.python_version(), "machine": platform.machine(),
+            "system": platform.system(), "cpus": os.cpu_count()}
+
+def load_baseline(path):
+    try:
+        with open(path, encoding="utf-8") as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return None
+
+def save_baseline(path, results):
+    """Les mesures remplacent celles de la référence ; les autres cas / tailles sont gardés."""
+    baseline = load_baseline(path) or {"results": {}}
+    baseline["results"].update(results)
+    baseline["environment"] = environment()
+    baseline["saved"] = datetime.now().isoformat(timespec="seconds")
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(baseline, f, indent=2, sort_keys=True)
+        f.write("\n")
+
+def compare(current, base, max_slowdown, max_memory_growth):
+    """Liste des régressions (texte) de current par rapport à base."""
+    problems = []
+    if current["items_per_s"] < base["items_per_s"] * (1 - max_slowdown):
+        problems.append(f"throughput {current['items_per_s'] / base['items_per_s'] - 1:+.0%}")
+    growth = current["peak_kb"] - base["peak_kb"]
+    if growth > MEMORY_SLACK_KB and current["peak_kb"] > base["peak_kb"] * (1 + max_memory_growth):
+        problems.append(f"peak memory {current['peak_kb'] / base['peak_kb'] - 1:+.0%}")
+    return problems
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="Benchmark suite with regression check against a JSON baseline")
+    ap.add_argument("--cases", default=",".join(CASES), help="cas à mesurer, séparés par des virgules")
+    ap.add_argument("--sizes", default=",".join(map(str, SIZES)), help="nombres d'entrées")
+    ap.add_argument("--repeat", type=int, default=5, help="passes par mesure (médiane retenue)")
+    ap.add_argument("--baseline", type=Path, default=BASELINE_PATH, help="fichier JSON de référence")
+    ap.add_argument("--save", action="store_true", help="écrire les mesures dans la référence")
+    ap.add_argument("--max-slowdown", type=float, default=0.25, help="baisse de débit tolérée (0.25 = 25 %%)")
+    ap.add_argument("--max-memory-growth", type=float, default=0.25, help="hausse de pic mémoire tolérée")
+    args = ap.parse_args(argv)
+
+    cases = [c.strip() for c in args.cases.split(",") if c.strip()]
+    unknown = [c for c in cases if c not in CASES]
+    if unknown:
+        ap.error(f"unknown case(s): {', '.join(unknown)} (available: {', '.join(CASES)})")
+    sizes = [int(s) for s in args.sizes.split(",") if s.strip()]
+    baseline = None if args.save else load_baseline(args.baseline)
+    if baseline and baseline.get("environment") != environment():
+        print(f"warning: baseline recorded on {baseline.get('environment')}, running on {environment()}",
+              file=sys.stderr)
+    base_results = (baseline or {}).get("results", {})
+
+    print(f"{'case':<22} {'entries':>8} {'entries/s':>12} {'vs base':>8} {'peak KB':>10} {'vs base':>8}  status")
+    results, regressions = {}, 0
+    for case in cases:
+        for n in sizes:
+            key = f"{case}/{n}"
+            res = results[key] = measure(case, n, args.repeat)
+            base = base_results.get(key)
+            if base:
+                problems = compare(res, base, args.max_slowdown, args.max_memory_growth)
+                regressions += bool(problems)
+                status = "REGRESSION: " + ", ".join(problems) if problems else "ok"
+                vs_speed = f"{res['items_per_s'] / base['items_per_s'] - 1:+.0%}"
+                vs_mem = f"{res['peak_kb'] / base['peak_kb'] - 1:+.0%}" if base["peak_kb"] else "-"
+            else:
+                status, vs_speed, vs_mem = "new" if baseline else "-", "", ""
+            print(f"{case:<22} {n:>8} {res['items_per_s']:>12,.0f} {vs_speed:>8} {res['peak_kb']:>10,.1f} "
+                  f"{vs_mem:>8}  {status}", flush=True)
+
+    if args.save:
+        save_baseline(args.baseline, results)
+        print(f"baseline written to {args.baseline}")
+    elif baseline is None:
+        print(f"no baseline at {args.baseline}; run with --save to record one")
+    if regressions:
+        print(f"{regressions} regression(s) past the thresholds")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
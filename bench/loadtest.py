@@ -0,0 +1,123 @@
+"""Test de charge de l'API HTTP (api.py) en local : latences p50 / p99 et requêtes par seconde.
+
+    python bench/loadtest.py [--concurrency 16] [--requests 400] [--records 1000] [--endpoint batch]
+    python bench/loadtest.py --endpoint pdf --records 200 --requests 40
+    python bench/loadtest.py --url 127.0.0.1:8765          (serveur déjà lancé)
+
+Sans --url, le serveur est lancé dans un sous-processus sur un port libre. Chaque client
+garde sa connexion ouverte (keep-alive) ; la latence va de l'envoi de la requête à la
+lecture complète de la réponse (dernière ligne NDJSON ou dernier octet du PDF).
+"""
+import argparse, asyncio, json, os, socket, subprocess, sys, time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+from api import body_chunks, read_head
+from naming import LANGUAGES, SUBTITLES
+
+
+def records(n):
+    return [{
+        "program": f"Program {i % 100}", "version": f"V{i % 7}", "date": "2024-05-01",
+        "language": LANGUAGES[i % len(LANGUAGES)][0], "subtitles": SUBTITLES[i % len(SUBTITLES)][0],
+        "fileformat": "ProRes_422HQ", "videoformat": "UHD", "videoaspect": "1.85", "videores": "3840x2160",
+        "cadence": "25", "audioformat": "51", "audiocodec": "PCM",
+    } for i in range(n)]
+
+def payload(endpoint, n):
+    """(chemin, type de contenu, corps) d'une requête de n enregistrements."""
+    rows = records(n)
+    if endpoint == "batch":
+        body = "".join(json.dumps(r) + "\n" for r in rows)
+        return "/batch", "application/x-ndjson", body.encode("utf-8")
+    body = {"program": "Loadtest", "entries": [dict(r, description="Master PAD") for r in rows]}
+    return "/pdf", "application/json", json.dumps(body).encode("utf-8")
+
+async def one_request(reader, writer, host, path, content_type, body):
+    writer.write((f"POST {path} HTTP/1.1\r\nHost: {host}\r\nContent-Type: {content_type}\r\n"
+                  f"Content-Length: {len(body)}\r\n\r\n").encode("latin-1") + body)
+    await writer.drain()
+    start, headers = await read_head(reader)
+    lines = size = 0
+    async for chunk in body_chunks(reader, headers):
+        size += len(chunk)
+        lines += chunk.count(b"\n")
+    return int(start.split()[1]), lines, size
+
+async def client(host, port, todo, request, expected_lines, latencies, failures):
+    reader, writer = await asyncio.open_connection(host, port)
+    try:
+        while todo[0] > 0:
+            todo[0] -= 1
+            t0 = time.perf_counter()
+            status, lines, _ = await one_request(reader, writer, host, *request)
+            latencies.append(time.perf_counter() - t0)
+            # /batch : une ligne de résultat par enregistrement envoyé
+            if status != 200 or (request[0] == "/batch" and lines != expected_lines):
+                failures.append(status)
+    finally:
+        writer.close()
+
+async def run(host, port, concurrency, total, request, expected_lines):
+    latencies, failures, todo = [], [], [total]
+    t0 = time.perf_counter()
+    await asyncio.gather(*(client(host, port, todo, request, expected_lines, latencies, failures)
+                           for _ in range(concurrency)))
+    return time.perf_counter() - t0, latencies, failures
+
+def percentile(sorted_values, p):
+    return sorted_values[min(len(sorted_values) - 1, int(p / 100 * len(sorted_values)))]
+
+def start_server():
+    """Lance api.py sur un port libre ; renvoie (processus, port) une fois le serveur à l'écoute."""
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        port = s.getsockname()[1]
+    proc = subprocess.Popen([sys.executable, str(ROOT / "api.py"), "--port", str(port)],
+                            stderr=subprocess.PIPE, text=True)
+    line = proc.stderr.readline()
+    if "listening" not in line:
+        proc.kill()
+        raise SystemExit(f"server did not start: {line.strip()}")
+    return proc, port
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="Load test of the local HTTP API")
+    ap.add_argument("--url", help="host:port d'un serveur déjà lancé (sinon lancé ici)")
+    ap.add_argument("--endpoint", choices=("batch", "pdf"), default="batch")
+    ap.add_argument("--concurrency", type=int, default=16, help="connexions simultanées")
+    ap.add_argument("--requests", type=int, default=400, help="nombre total de requêtes")
+    ap.add_argument("--records", type=int, default=1000, help="enregistrements par requête")
+    ap.add_argument("--warmup", type=int, default=2, help="requêtes de chauffe (non mesurées)")
+    args = ap.parse_args(argv)
+
+    proc = None
+    if args.url:
+        host, port = args.url.rsplit(":", 1)
+        port = int(port)
+    else:
+        proc, port = start_server()
+        host = "127.0.0.1"
+    request = payload(args.endpoint, args.records)
+    try:
+        asyncio.run(run(host, port, 1, args.warmup, request, args.records))
+        elapsed, latencies, failures = asyncio.run(run(host, port, args.concurrency, args.requests, request,
+                                                       args.records))
+    finally:
+        if proc:
+            proc.terminate()
+            proc.wait()
+    lat = sorted(latencies)
+    print(f"endpoint /{args.endpoint}: {args.requests} requests x {args.records} records, "
+          f"concurrency {args.concurrency}, server pid {proc.pid if proc else '-'} (cpus: {os.cpu_count()})")
+    print(f"{'req/s':>9} {'records/s':>11} {'p50 (ms)':>9} {'p99 (ms)':>9} {'max (ms)':>9} {'errors':>7}")
+    print(f"{len(lat) / elapsed:>9.1f} {len(lat) * args.records / elapsed:>11,.0f} "
+          f"{percentile(lat, 50) * 1000:>9.1f} {percentile(lat, 99) * 1000:>9.1f} {lat[-1] * 1000:>9.1f} "
+          f"{len(failures):>7}")
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,241 @@
+"""Empreintes (checksums) des masters livrés.
+
+    python checksum.py names.csv --root /mnt/masters --algo xxh64 --manifest delivery.xxh64
+
+names.csv (ou .xlsx / .json / .jsonl / .txt) : une colonne « filename » avec les noms
+générés (ou un nom par ligne en .txt). Les fichiers sont retrouvés sous --root par
+leur nom sans extension (« Film_…_240501.mov », séquences « Film_…_240501.000123.dpx »).
+
+Lecture par gros blocs (ou mmap) dans un pool de threads : hashlib relâche le GIL
+sur les gros tampons. Un cache SQLite (chemin, taille, mtime) évite de recalculer
+l'empreinte d'un fichier inchangé.
+"""
+import argparse, hashlib, mmap, os, sqlite3, sys, time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+try:
+    import xxhash
+except ImportError:  # xxh64 indisponible, md5 / sha256 restent utilisables
+    xxhash = None
+
+from importer import read_names
+from naming import BASE_DIR
+
+ALGORITHMS = ("xxh64", "md5", "sha256")
+CHUNK_SIZE = 8 * 1024 * 1024
+DEFAULT_WORKERS = 4
+CACHE_PATH = str(BASE_DIR / "checksums.sqlite")
+
+
+def available_algorithms():
+    return [a for a in ALGORITHMS if a != "xxh64" or xxhash is not None]
+
+
+def new_hasher(algo):
+    if algo == "xxh64":
+        if xxhash is None:
+            raise ValueError("xxh64 needs the xxhash package (pip install xxhash)")
+        return xxhash.xxh64()
+    if algo in ("md5", "sha256"):
+        return hashlib.new(algo)
+    raise ValueError(f"unsupported algorithm: {algo}")
+
+def hash_file(path, algo="sha256", use_mmap=False, chunk_size=CHUNK_SIZE):
+    """Empreinte hexadécimale d'un fichier, lu par blocs de chunk_size (ou via mmap)."""
+    h = new_hasher(algo)
+    with open(path, "rb") as f:
+        size = os.fstat(f.fileno()).st_size
+        if use_mmap and size:
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as m:
+                view = memoryview(m)
+                try:
+                    for pos in range(0, size, chunk_size):
+                        h.update(view[pos:pos + chunk_size])
+                finally:
+                    view.release()
+        else:
+            # Un seul tampon réutilisé : pas d'allocation par bloc
+            buf = bytearray(chunk_size)
+            view = memoryview(buf)
+            while n := f.readinto(buf):
+                h.update(view[:n])
+    return h.hexdigest()
+
+
+class Cache:
+    """Empreintes déjà calculées : (chemin, algo) → (taille, mtime, empreinte)."""
+
+    def __init__(self, path=CACHE_PATH):
+        self.db = sqlite3.connect(path)
+        self.db.execute("PRAGMA journal_mode=WAL")
+        self.db.execute("""CREATE TABLE IF NOT EXISTS checksums (
+            path TEXT, algo TEXT, size INTEGER, mtime_ns INTEGER, digest TEXT,
+            PRIMARY KEY (path, algo))""")
+
+    def get(self, path, algo, st):
+        row = self.db.execute("SELECT size, mtime_ns, digest FROM checksums WHERE path = ? AND algo = ?",
+                              (path, algo)).fetchone()
+        if row and row[:2] == (st.st_size, st.st_mtime_ns):
+            return row[2]
+        return None
+
+    def put(self, path, algo, st, digest):
+        self.db.execute("INSERT OR REPLACE INTO checksums VALUES (?, ?, ?, ?, ?)",
+                        (path, algo, st.st_size, st.st_mtime_ns, digest))
+
+    def close(self):
+        self.db.commit()
+        self.db.close()
+
+
+def hash_files(paths, algo="sha256", workers=DEFAULT_WORKERS, cache=None, use_mmap=False):
+    """Générateur (chemin, empreinte, depuis le cache, erreur) ; les fichiers inchangés ne sont pas relus.
+
+    Un fichier illisible ou disparu donne (chemin, None, False, message) sans arrêter les autres.
+    Les résultats arrivent dans l'ordre d'achèvement ; le cache n'est lu et écrit que depuis le
+    thread appelant (une connexion SQLite ne se partage pas entre threads).
+    """
+    new_hasher(algo)  # algorithme invalide ou absent : erreur avant de lancer le pool
+    todo = []
+    for p in paths:
+        p = os.path.abspath(p)
+        try:
+            st = os.stat(p)
+        except OSError as exc:
+            yield p, None, False, _os_error(exc)
+            continue
+        digest = cache.get(p, algo, st) if cache else None
+        if digest:
+            yield p, digest, True, None
+        else:
+            todo.append((p, st))
+    if not todo:
+        return
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        futures = {pool.submit(hash_file, p, algo, use_mmap): (p, st) for p, st in todo}
+        for fut in as_completed(futures):
+            p, st = futures[fut]
+            try:
+                digest = fut.result()
+            except OSError as exc:
+                yield p, None, False, _os_error(exc)
+                continue
+            if cache:
+                # Le fichier a pu changer pendant la lecture : on ne garde que si taille et date sont identiques
+                try:
+                    after = os.stat(p)
+                except OSError:
+                    after = None
+                if after and (after.st_size, after.st_mtime_ns) == (st.st_size, st.st_mtime_ns):
+                    cache.put(p, algo, st, digest)
+            yield p, digest, False, None
+
+def _os_error(exc):
+    return exc.strerror or str(exc)
+
+def matching_name(filename, wanted):
+    """Nom généré de wanted que porte filename, extension(s) en plus ; None sinon.
+
+    Un nom généré peut contenir des points (cadence 23.976) : on retire les « .ext » de la
+    fin un par un jusqu'à trouver un nom complet (« …_23.976_20_240501.000123.dpx »).
+    """
+    name = filename
+    while True:
+        if name in wanted:
+            return name
+        head, dot, _ = name.rpartition(".")
+        if not dot or not head:
+            return None
+        name = head
+
+def find_files(roots, names):
+    """{nom généré: [chemins]} des fichiers sous roots qui portent le nom complet (extensions en plus)."""
+    wanted = set(names)
+    found = {}
+    for root in roots:
+        for dirpath, dirnames, files in os.walk(root):
+            dirnames[:] = [d for d in dirnames if not d.startswith(".")]
+            for f in files:
+                name = matching_name(f, wanted)
+                if name is not None:
+                    found.setdefault(name, []).append(os.path.join(dirpath, f))
+    for paths in found.values():
+        paths.sort()
+    return found
+
+def checksum_labels(found, digests, algo):
+    """{nom généré: texte pour le rapport PDF} ; une séquence renvoie au manifeste.
+
+    Un nom dont aucun fichier n'a pu être lu (absent de digests) n'a pas de texte.
+    """
+    labels = {}
+    for name, paths in found.items():
+        hashed = [p for p in paths if os.path.abspath(p) in digests]
+        if not hashed:
+            continue
+        if len(paths) == 1:
+            labels[name] = f"{algo} {digests[os.path.abspath(paths[0])]}"
+        elif len(hashed) < len(paths):
+            labels[name] = f"{algo}: {len(hashed)} of {len(paths)} files, see manifest"
+        else:
+            labels[name] = f"{algo}: {len(paths)} files, see manifest"
+    return labels
+
+def write_manifest(out, digests, base=None):
+    """Manifeste au format de sha256sum / md5sum (« empreinte  chemin »), chemins relatifs à base."""
+    for path in sorted(digests):
+        rel = os.path.relpath(path, base) if base else path
+        out.write(f"{digests[path]}  {rel}\n")
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="Clean Masters Filename Generator — checksum manifest")
+    ap.add_argument("names", help="liste des noms générés (CSV/XLSX/JSON avec filename, ou .txt)")
+    ap.add_argument("--root", action="append", required=True, help="dossier où chercher les masters (répétable)")
+    ap.add_argument("--algo", choices=ALGORITHMS, default="sha256", help="xxh64 nécessite le paquet xxhash")
+    ap.add_argument("--workers", type=int, default=DEFAULT_WORKERS, help="threads de lecture")
+    ap.add_argument("--mmap", action="store_true", help="lecture via mmap plutôt que par blocs")
+    ap.add_argument("--cache", default=CACHE_PATH, help="cache SQLite des empreintes")
+    ap.add_argument("--manifest", default="-", help="manifeste de sortie (défaut : stdout)")
+    args = ap.parse_args(argv)
+
+    names = read_names(args.names)
+    found = find_files(args.root, names)
+    missing = [n for n in names if n not in found]
+    for n in missing:
+        print(f"not found: {n}", file=sys.stderr)
+    paths = [p for ps in found.values() for p in ps]
+    cache = Cache(args.cache)
+    digests, cached, total_bytes, failed = {}, 0, 0, 0
+    t0 = time.perf_counter()
+    try:
+        for path, digest, from_cache, error in hash_files(paths, args.algo, args.workers, cache, args.mmap):
+            if error:
+                print(f"unreadable: {path}: {error}", file=sys.stderr)
+                failed += 1
+                continue
+            digests[path] = digest
+            cached += from_cache
+            if not from_cache:
+                try:
+                    total_bytes += os.path.getsize(path)
+                except OSError:
+                    pass
+    finally:
+        cache.close()
+    elapsed = time.perf_counter() - t0
+    out = sys.stdout if args.manifest == "-" else open(args.manifest, "w", encoding="utf-8")
+    try:
+        base = os.path.dirname(os.path.abspath(args.manifest)) if args.manifest != "-" else None
+        write_manifest(out, digests, base)
+    finally:
+        if out is not sys.stdout:
+            out.close()
+    rate = total_bytes / elapsed / 1e6 if elapsed else 0.0
+    print(f"{len(digests)} files ({cached} from cache), {failed} unreadable, {len(missing)} names not found, "
+          f"{elapsed:.2f} s ({rate:,.0f} MB/s)", file=sys.stderr)
+    return 1 if missing or failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
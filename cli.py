@@ -0,0 +1,103 @@
+"""CLI batch : lit des lignes CSV/JSONL et écrit noms + segments typés au fil de l'eau.
+
+    python cli.py deliveries.csv > names.jsonl
+    cat rows.jsonl | python cli.py --input-format jsonl --output-format tsv
+
+Les colonnes attendues sont celles de `naming.FIELDS` (program, version, date, …).
+Chaque ligne est traitée puis écrite immédiatement : la mémoire reste constante
+quelle que soit la taille de l'entrée.
+"""
+import argparse, csv, json, sys
+from datetime import date
+
+from naming import FIELDS, REQUIRED_FIELDS, build_name, cache_stats, parse_date
+
+
+def read_rows(stream, fmt):
+    """Itère sur les lignes (dicts) d'un flux CSV ou JSONL, sans rien charger en mémoire.
+
+    Une ligne JSONL illisible est rendue sous forme de ValueError (signalée par generate).
+    """
+    if fmt == "csv":
+        yield from csv.DictReader(stream)
+    else:
+        for line in stream:
+            line = line.strip()
+            if line:
+                try:
+                    yield json.loads(line)
+                except ValueError as exc:
+                    yield ValueError(f"invalid JSON: {exc}")
+
+def text_row(row):
+    """Ligne en valeurs texte (JSON : « cadence »: 25 est accepté, null devient vide)."""
+    if not isinstance(row, dict):
+        raise ValueError("record must be a JSON object")
+    if all(type(v) is str for v in row.values()):
+        return row
+    return {k: v if isinstance(v, str) else "" if v is None else str(v) for k, v in row.items()}
+
+def row_to_args(row):
+    """Convertit une ligne brute en arguments positionnels pour build_name."""
+    row = text_row(row)
+    missing = [k for k in REQUIRED_FIELDS if k != "date" and not (row.get(k) or "").strip()]
+    if missing:
+        raise ValueError(f"missing required field(s): {', '.join(missing)}")
+    values = {k: (row.get(k) or "").strip() for k in FIELDS}
+    # Même comportement que build_filename : date du jour si absente
+    values["date"] = parse_date(row.get("date")) or date.today()
+    return [values[k] for k in FIELDS]
+
+def generate(rows):
+    """Générateur (numéro de ligne, filename, segments) ou (numéro, None, erreur)."""
+    for lineno, row in enumerate(rows, start=1):
+        try:
+            if isinstance(row, ValueError):
+                raise row
+            args = row_to_args(row)
+        except ValueError as exc:
+            yield lineno, None, str(exc)
+            continue
+        yield (lineno, *build_name(*args))
+
+def write_result(out, fmt, filename, segments):
+    if fmt == "jsonl":
+        out.write(json.dumps({"filename": filename, "segments": segments}, ensure_ascii=False))
+    else:
+        out.write(filename)
+        for t, val in segments:
+            out.write(f"\t{t}={val}")
+    out.write("\n")
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="Clean Masters Filename Generator — batch mode")
+    ap.add_argument("input", nargs="?", default="-", help="fichier CSV/JSONL (défaut : stdin)")
+    ap.add_argument("--input-format", choices=("csv", "jsonl"), help="déduit de l'extension si absent (défaut csv)")
+    ap.add_argument("--output-format", choices=("jsonl", "tsv"), default="jsonl")
+    ap.add_argument("--stats", action="store_true", help="affiche les hits/misses des caches sur stderr")
+    args = ap.parse_args(argv)
+
+    in_fmt = args.input_format
+    if in_fmt is None:
+        in_fmt = "jsonl" if args.input.endswith((".jsonl", ".ndjson")) else "csv"
+
+    stream = sys.stdin if args.input == "-" else open(args.input, encoding="utf-8", newline="")
+    errors = 0
+    try:
+        for lineno, filename, result in generate(read_rows(stream, in_fmt)):
+            if filename is None:
+                errors += 1
+                print(f"row {lineno}: {result}", file=sys.stderr)
+                continue
+            write_result(sys.stdout, args.output_format, filename, result)
+    finally:
+        if stream is not sys.stdin:
+            stream.close()
+    if args.stats:
+        for name, info in cache_stats().items():
+            print(f"cache {name}: {info.hits} hits, {info.misses} misses, {info.currsize}/{info.maxsize}", file=sys.stderr)
+    return 1 if errors else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,59 @@
+"""Liste des entrées : un seul composant Streamlit, virtualisé côté navigateur.
+
+La copie, l'édition de description et la suppression sont gérées dans le composant,
+qui renvoie des lots d'opérations (deltas) plutôt qu'un widget par ligne.
+"""
+from pathlib import Path
+
+import streamlit.components.v1 as components
+
+
+TYPE_COLORS = {
+    "PROGRAM":      "#1565C0",
+    "VERSION":      "#6A1B9A",
+    "LANG_SUB":     "#2E7D32",
+    "FILE_FORMAT":  "#EF6C00",
+    "VIDEO_FORMAT": "#00838F",
+    "VIDEO_ASPECT": "#AD1457",
+    "RESOLUTION":   "#283593",
+    "CADENCE":      "#6D4C41",
+    "AUDIO_FORMAT": "#C62828",
+    "AUDIO_CODEC":  "#455A64",
+    "DATE":         "#4FC3F7",  # bleu clair fixe
+}
+
+DESCRIPTION_MAX_CHARS = 50
+
+_component = components.declare_component(
+    "entries_list", path=str(Path(__file__).resolve().parent / "frontend" / "entries_list")
+)
+
+
+def entry_rows(entries, keys=None):
+    """Lignes envoyées au composant : le navigateur en tire le nom coloré par segment (TYPE_COLORS)."""
+    if keys is None:
+        return [{"k": e.key, "n": e.filename, "d": e.description, "s": e.segments} for e in entries]
+    return [{"k": e.key, "i": display_id, "n": e.filename, "d": e.description, "s": e.segments}
+            for display_id, e in entries.numbered(keys)]
+
+def entries_list(entries, key="entries_list", keys=None):
+    """Affiche la liste (EntryStore) ; renvoie le dernier lot {"id", "ops"} envoyé par le navigateur (ou None).
+
+    keys : clés à afficher (résultat d'une recherche) ; les ID affichés restent ceux de la liste complète.
+    """
+    return _component(entries=entry_rows(entries, keys), colors=TYPE_COLORS, key=key, default=None)
+
+def apply_deltas(entries, ops):
+    """Applique un lot d'opérations sur l'EntryStore ; renvoie True si la liste a changé.
+
+    ops : [{"op": "desc", "key": k, "value": "…"}, {"op": "delete", "key": k}, …]
+    """
+    changed = False
+    with entries.batch():
+        for op in ops:
+            if op.get("op") == "desc":
+                value = str(op.get("value") or "")[:DESCRIPTION_MAX_CHARS]
+                changed |= entries.set_description(op.get("key"), value)
+            elif op.get("op") == "delete":
+                changed |= entries.delete(op.get("key"))
+    return changed
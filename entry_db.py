@@ -0,0 +1,283 @@
+"""Stockage persistant (facultatif) des listes d'entrées dans SQLite.
+
+Avec `backend = sqlite` dans la section [storage] de config.ini, chaque liste est
+retrouvée par son identifiant (paramètre ?list=… de l'URL) : elle survit à un
+rechargement de la page et à un redémarrage du serveur, et une session ne garde en
+mémoire que cet identifiant. Une seule connexion (WAL) est partagée par toutes les
+sessions du processus ; les entrées sont relues page par page, à la demande.
+
+    python entry_db.py lists [--program NAME]
+    python entry_db.py purge --days 30
+"""
+import argparse, sqlite3, sys, threading, uuid
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+from pathlib import Path
+
+from entry_store import Entry, EntryStore, _intern_layout
+from naming import BASE_DIR, CONFIG_PATH, read_config
+from search import SearchIndex
+
+DB_PATH = str(BASE_DIR / "entries.sqlite")
+# Entrées relues par requête lors d'un parcours de la liste
+PAGE_SIZE = 2000
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS lists (
+    id TEXT PRIMARY KEY, program TEXT NOT NULL DEFAULT '', next_key INTEGER NOT NULL DEFAULT 1,
+    version INTEGER NOT NULL DEFAULT 0, updated TEXT NOT NULL) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS lists_program ON lists (program);
+CREATE TABLE IF NOT EXISTS entries (
+    list_id TEXT NOT NULL, key INTEGER NOT NULL, filename TEXT NOT NULL,
+    description TEXT NOT NULL DEFAULT '', layout TEXT NOT NULL DEFAULT '', lengths TEXT NOT NULL DEFAULT '',
+    PRIMARY KEY (list_id, key)) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS entries_filename ON entries (list_id, filename);
+"""
+
+
+def load_storage(cfg_path=CONFIG_PATH):
+    """(backend, chemin de la base) depuis [storage] ; backend « memory » par défaut."""
+    cp = read_config(cfg_path)
+    backend = cp.get("storage", "backend", fallback="memory").strip().lower()
+    path = cp.get("storage", "path", fallback="").strip()
+    return backend, str(BASE_DIR / path) if path else DB_PATH
+
+def new_list_id():
+    return uuid.uuid4().hex
+
+def _now():
+    return datetime.now().isoformat(timespec="seconds")
+
+
+class EntryDatabase:
+    """Connexion partagée entre threads (sessions) ; les écritures passent par transaction()."""
+
+    def __init__(self, path=DB_PATH):
+        self.path = path
+        self.lock = threading.RLock()
+        # Autocommit : les transactions sont ouvertes explicitement (BEGIN IMMEDIATE)
+        self.db = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self.db.execute("PRAGMA journal_mode=WAL")
+        self.db.execute("PRAGMA synchronous=NORMAL")
+        self.db.execute("PRAGMA busy_timeout=5000")
+        self.db.executescript(_SCHEMA)
+
+    @contextmanager
+    def transaction(self):
+        """Transaction d'écriture ; imbriquée, seule la plus externe valide (ou annule)."""
+        with self.lock:
+            outer = not self.db.in_transaction
+            if outer:
+                self.db.execute("BEGIN IMMEDIATE")
+            try:
+                yield self.db
+            except BaseException:
+                if outer:
+                    self.db.execute("ROLLBACK")
+                raise
+            if outer:
+                self.db.execute("COMMIT")
+
+    def fetchall(self, sql, params=()):
+        with self.lock:
+            return self.db.execute(sql, params).fetchall()
+
+    def fetchone(self, sql, params=()):
+        with self.lock:
+            return self.db.execute(sql, params).fetchone()
+
+    def lists(self, program=None):
+        """[(id, programme, nombre d'entrées, dernière modification)], les plus récentes d'abord."""
+        sql = ("SELECT l.id, l.program, (SELECT count(*) FROM entries e WHERE e.list_id = l.id), l.updated "
+               "FROM lists l")
+        if program is not None:
+            return self.fetchall(sql + " WHERE l.program = ? ORDER BY l.updated DESC", (program,))
+        return self.fetchall(sql + " ORDER BY l.updated DESC")
+
+    def purge(self, before):
+        """Supprime les listes non modifiées depuis before (datetime) ; renvoie leur nombre."""
+        with self.transaction() as db:
+            stale = [r[0] for r in db.execute("SELECT id FROM lists WHERE updated < ?",
+                                              (before.isoformat(timespec="seconds"),))]
+            for list_id in stale:
+                db.execute("DELETE FROM entries WHERE list_id = ?", (list_id,))
+                db.execute("DELETE FROM lists WHERE id = ?", (list_id,))
+        return len(stale)
+
+    def close(self):
+        self.db.close()
+
+
+# Suites de types relues de la base (texte « PROGRAM,VERSION,… ») -> tuple interné
+_LAYOUT_CACHE = {}
+
+def _restore(row, sep):
+    key, filename, description, layout, lengths = row
+    types = _LAYOUT_CACHE.get(layout)
+    if types is None:
+        types = _LAYOUT_CACHE[layout] = _intern_layout(layout.split(",")) if layout else ()
+    return Entry.restore(key, filename, description, types,
+                         tuple(map(int, lengths.split(","))) if lengths else (), sep)
+
+
+class SqliteEntryStore(EntryStore):
+    """Même interface qu'EntryStore, sur une liste de la base ; rien n'est gardé en mémoire hormis
+    l'index de recherche, construit seulement si la session recherche."""
+
+    def __init__(self, database, list_id, sep="_"):
+        self.database = database
+        self.list_id = list_id
+        self.sep = sep
+        self._index = None
+        self._index_version = None  # version de la liste au moment où l'index a été construit
+        with database.transaction() as db:
+            db.execute("INSERT OR IGNORE INTO lists (id, updated) VALUES (?, ?)", (list_id, _now()))
+
+    @property
+    def program(self):
+        return self.database.fetchone("SELECT program FROM lists WHERE id = ?", (self.list_id,))[0]
+
+    @program.setter
+    def program(self, value):
+        with self.database.transaction() as db:
+            db.execute("UPDATE lists SET program = ? WHERE id = ? AND program != ?",
+                       (value, self.list_id, value))
+
+    def _changed(self, db, added=0):
+        """Réserve added clés, incrémente la version de la liste ; renvoie la première clé réservée.
+
+        Si la liste a été modifiée ailleurs (autre onglet, autre processus) depuis la construction
+        de l'index, celui-ci est abandonné et sera reconstruit à la prochaine recherche.
+        """
+        next_key, version = db.execute("SELECT next_key, version FROM lists WHERE id = ?",
+                                       (self.list_id,)).fetchone()
+        db.execute("UPDATE lists SET next_key = ?, version = ?, updated = ? WHERE id = ?",
+                   (next_key + added, version + 1, _now(), self.list_id))
+        if self._index is not None and self._index_version == version:
+            self._index_version = version + 1
+        else:
+            self._index = None
+        return next_key
+
+    def __len__(self):
+        return self.database.fetchone("SELECT count(*) FROM entries WHERE list_id = ?", (self.list_id,))[0]
+
+    def __bool__(self):
+        return self.database.fetchone("SELECT 1 FROM entries WHERE list_id = ? LIMIT 1",
+                                      (self.list_id,)) is not None
+
+    def __iter__(self):
+        """Parcours par pages de PAGE_SIZE (pagination sur la clé, sans OFFSET)."""
+        last = 0
+        while True:
+            rows = self.database.fetchall(
+                "SELECT key, filename, description, layout, lengths FROM entries "
+                "WHERE list_id = ? AND key > ? ORDER BY key LIMIT ?", (self.list_id, last, PAGE_SIZE))
+            for row in rows:
+                yield _restore(row, self.sep)
+            if len(rows) < PAGE_SIZE:
+                return
+            last = rows[-1][0]
+
+    def __contains__(self, key):
+        return self.get(key) is not None
+
+    def get(self, key):
+        row = self.database.fetchone(
+            "SELECT key, filename, description, layout, lengths FROM entries WHERE list_id = ? AND key = ?",
+            (self.list_id, key))
+        return _restore(row, self.sep) if row else None
+
+    def has_filename(self, filename):
+        return self.database.fetchone("SELECT 1 FROM entries WHERE list_id = ? AND filename = ? LIMIT 1",
+                                      (self.list_id, filename)) is not None
+
+    def add(self, filename, segments=(), description=""):
+        return self.extend([(filename, segments, description)])[0]
+
+    def extend(self, rows):
+        """Ajoute des (filename, segments, description) en une transaction et un executemany."""
+        rows = list(rows)
+        if not rows:
+            return []
+        with self.database.transaction() as db:
+            first = self._changed(db, added=len(rows))
+            entries = [Entry(first + i, *row, sep=self.sep) for i, row in enumerate(rows)]
+            db.executemany("INSERT INTO entries VALUES (?, ?, ?, ?, ?, ?)",
+                           ((self.list_id, e.key, e.filename, e.description, ",".join(e._layout),
+                             ",".join(map(str, e._lengths))) for e in entries))
+        if self._index is not None:
+            for e in entries:
+                self._index.add(e)
+        return [e.key for e in entries]
+
+    @contextmanager
+    def batch(self):
+        with self.database.transaction():
+            yield self
+
+    def delete(self, key):
+        with self.database.transaction() as db:
+            e = self.get(key)
+            if e is None:
+                return False
+            db.execute("DELETE FROM entries WHERE list_id = ? AND key = ?", (self.list_id, key))
+            self._changed(db)
+        if self._index is not None:
+            self._index.remove(e)
+        return True
+
+    def set_description(self, key, description):
+        with self.database.transaction() as db:
+            row = db.execute("SELECT description FROM entries WHERE list_id = ? AND key = ?",
+                             (self.list_id, key)).fetchone()
+            if row is None or row[0] == description:
+                return False
+            db.execute("UPDATE entries SET description = ? WHERE list_id = ? AND key = ?",
+                       (description, self.list_id, key))
+            self._changed(db)
+        if self._index is not None:
+            self._index.set_description(key, description)
+        return True
+
+    def clear(self):
+        with self.database.transaction() as db:
+            db.execute("DELETE FROM entries WHERE list_id = ?", (self.list_id,))
+            self._changed(db)
+        self._index = None
+
+    def search_index(self):
+        """Index de recherche en mémoire ; reconstruit si la liste a changé hors de cette session."""
+        with self.database.lock:
+            version = self.database.fetchone("SELECT version FROM lists WHERE id = ?", (self.list_id,))[0]
+            if self._index is None or self._index_version != version:
+                self._index = SearchIndex.build(self)
+                self._index_version = version
+        return self._index
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="Clean Masters Filename Generator — stored entry lists")
+    ap.add_argument("command", choices=("lists", "purge"))
+    ap.add_argument("--program", help="seulement les listes de ce programme (lists)")
+    ap.add_argument("--days", type=int, default=30, help="âge des listes à supprimer, en jours (purge)")
+    ap.add_argument("--db", default=load_storage()[1], help="base SQLite des listes")
+    args = ap.parse_args(argv)
+    if not Path(args.db).exists():
+        print(f"no database at {args.db}", file=sys.stderr)
+        return 1
+    database = EntryDatabase(args.db)
+    try:
+        if args.command == "purge":
+            n = database.purge(datetime.now() - timedelta(days=args.days))
+            print(f"{n} lists removed", file=sys.stderr)
+            return 0
+        for list_id, program, count, updated in database.lists(args.program):
+            print(f"{list_id}\t{program}\t{count}\t{updated}")
+        return 0
+    finally:
+        database.close()
+
+
+if __name__ == "__main__":
+    sys.exit(main())
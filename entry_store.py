@@ -0,0 +1,165 @@
+"""Stockage compact des entrées d'une session.
+
+Chaque entrée a une clé interne immuable ; la numérotation affichée (01, 02, …) est
+calculée à la demande. Les segments typés ne sont pas recopiés : l'entrée garde la
+suite de types (partagée entre toutes les entrées de même forme) et la longueur de
+chaque valeur, les valeurs étant relues dans le nom de fichier.
+"""
+import sys
+from contextlib import contextmanager
+
+from search import SearchIndex
+
+# Suites de types de segments partagées (internées) entre entrées et sessions
+_LAYOUTS = {}
+
+
+def _intern_layout(types):
+    types = tuple(sys.intern(t) for t in types)
+    return _LAYOUTS.setdefault(types, types)
+
+
+class Entry:
+    __slots__ = ("key", "filename", "description", "_layout", "_lengths", "_sep")
+
+    def __init__(self, key, filename, segments=(), description="", sep="_"):
+        self.key = key
+        self.filename = filename
+        self.description = description
+        self._sep = sep
+        values = [v for _, v in segments]
+        # Segments relisibles depuis le nom seulement s'ils le composent exactement
+        if values and sep.join(values) == filename:
+            self._layout = _intern_layout(t for t, _ in segments)
+            self._lengths = tuple(len(v) for v in values)
+        else:
+            self._layout = self._lengths = ()
+
+    @classmethod
+    def restore(cls, key, filename, description, layout, lengths, sep="_"):
+        """Entrée relue d'un stockage ; layout doit venir de _intern_layout (partagé entre entrées)."""
+        e = cls.__new__(cls)
+        e.key, e.filename, e.description, e._sep = key, filename, description, sep
+        e._layout, e._lengths = layout, lengths
+        return e
+
+    @property
+    def segments(self):
+        """Segments typés [(TYPE, valeur), …] reconstruits depuis le nom."""
+        out, pos = [], 0
+        for t, n in zip(self._layout, self._lengths):
+            out.append((t, self.filename[pos:pos + n]))
+            pos += n + len(self._sep)
+        return out
+
+
+class EntryStore:
+    """Entrées ordonnées, indexées par clé : ajout, suppression et édition en O(1)."""
+
+    def __init__(self, sep="_"):
+        self.program = ""
+        self._rows = {}  # clé -> Entry, dans l'ordre d'ajout
+        self._names = {}  # nom de fichier -> nombre d'entrées qui le portent
+        self._index = None  # SearchIndex, construit à la première recherche puis tenu à jour
+        self._next_key = 1
+        self.sep = sep
+
+    def __len__(self):
+        return len(self._rows)
+
+    def __bool__(self):
+        return bool(self._rows)
+
+    def __iter__(self):
+        return iter(self._rows.values())
+
+    def __contains__(self, key):
+        return key in self._rows
+
+    def get(self, key):
+        return self._rows.get(key)
+
+    def has_filename(self, filename):
+        """Vrai si une entrée porte déjà ce nom (O(1))."""
+        return filename in self._names
+
+    def add(self, filename, segments=(), description=""):
+        key = self._next_key
+        self._next_key += 1
+        e = self._rows[key] = Entry(key, filename, segments, description, self.sep)
+        self._names[filename] = self._names.get(filename, 0) + 1
+        if self._index is not None:
+            self._index.add(e)
+        return key
+
+    def extend(self, rows):
+        """Ajoute des (filename, segments, description) en une fois ; renvoie les clés."""
+        return [self.add(*row) for row in rows]
+
+    @contextmanager
+    def batch(self):
+        """Regroupe plusieurs modifications (une seule transaction pour un stockage persistant)."""
+        yield self
+
+    def delete(self, key):
+        e = self._rows.pop(key, None)
+        if e is None:
+            return False
+        if self._index is not None:
+            self._index.remove(e)
+        n = self._names[e.filename] - 1
+        if n:
+            self._names[e.filename] = n
+        else:
+            del self._names[e.filename]
+        return True
+
+    def set_description(self, key, description):
+        e = self._rows.get(key)
+        if e is None or e.description == description:
+            return False
+        e.description = description
+        if self._index is not None:
+            self._index.set_description(key, description)
+        return True
+
+    def clear(self):
+        self._rows.clear()
+        self._names.clear()
+        self._index = None
+
+    def search_index(self):
+        """Index de recherche (segments, texte) ; construit au premier appel, incrémental ensuite."""
+        if self._index is None:
+            self._index = SearchIndex.build(self)
+        return self._index
+
+    def numbered(self, keys=None):
+        """(ID affiché, entrée) : 01, 02, … selon l'ordre courant ; seulement les clés données si keys."""
+        for n, e in enumerate(self, start=1):
+            if keys is None or e.key in keys:
+                yield f"{n:02d}", e
+
+    def columns(self, types):
+        """{TYPE: [valeur par entrée]} pour quelques types de segments, sans reconstruire les segments."""
+        out = {t: [] for t in types}
+        cols = [out[t] for t in types]
+        positions = {}  # suite de types -> position de chaque type demandé (-1 : absent)
+        sep_len = len(self.sep)
+        for e in self:
+            pos = positions.get(e._layout)
+            if pos is None:
+                pos = positions[e._layout] = [e._layout.index(t) if t in e._layout else -1 for t in types]
+            lengths = e._lengths
+            for col, i in zip(cols, pos):
+                if i < 0:
+                    col.append("")
+                else:
+                    start = sum(lengths[:i]) + i * sep_len
+                    col.append(e.filename[start:start + lengths[i]])
+        return out
+
+    def export_rows(self):
+        """Dicts {id, filename, description, segments} pour l'export (PDF, CLI…)."""
+        return [{"id": display_id, "filename": e.filename, "description": e.description,
+                 "segments": e.segments} for display_id, e in self.numbered()]
@@ -0,0 +1,189 @@
+"""Historique des noms déjà livrés, pour repérer une collision avec une livraison passée.
+
+    python history.py add delivered.csv [--date 2024-05-01]
+    python history.py check names.csv
+    python history.py rebuild
+
+Les noms sont dans une table SQLite (clé primaire, sans rowid) ; un filtre de Bloom
+enregistré à côté (history.bloom) répond « jamais livré » sans toucher la base pour
+l'immense majorité des noms neufs. Seuls les positifs du filtre sont confirmés en SQL.
+
+Le filtre porte le nombre de noms qu'il contient ; s'il diffère de celui de la base
+(ajouts depuis un autre processus), il est relu ou reconstruit avant toute réponse :
+il ne peut pas donner de faux négatif.
+"""
+import argparse, hashlib, math, os, sqlite3, struct, sys, threading
+from datetime import date
+from pathlib import Path
+
+from importer import read_names
+from naming import BASE_DIR, parse_date
+
+HISTORY_PATH = str(BASE_DIR / "history.sqlite")
+ERROR_RATE = 0.01
+MIN_CAPACITY = 1_000_000
+# Requêtes de confirmation par paquets (limite de variables SQLite)
+SQL_BATCH = 500
+
+
+class BloomFilter:
+    """Filtre de Bloom (bytearray) avec double hachage sur une empreinte blake2b de 128 bits."""
+
+    _HEADER = struct.Struct("<QQQQ")  # bits, fonctions de hachage, capacité, nombre de noms
+
+    def __init__(self, capacity, error_rate=ERROR_RATE, *, m=None, k=None, bits=None, count=0):
+        self.capacity = capacity
+        self.m = m or math.ceil(-capacity * math.log(error_rate) / math.log(2) ** 2)
+        self.k = k or max(1, round(self.m / capacity * math.log(2)))
+        self.bits = bits if bits is not None else bytearray((self.m + 7) // 8)
+        self.count = count
+
+    def _positions(self, name):
+        d = hashlib.blake2b(name.encode("utf-8"), digest_size=16).digest()
+        h1 = int.from_bytes(d[:8], "little")
+        h2 = int.from_bytes(d[8:], "little") | 1
+        m = self.m
+        return [(h1 + i * h2) % m for i in range(self.k)]
+
+    def add(self, name):
+        bits = self.bits
+        for p in self._positions(name):
+            bits[p >> 3] |= 1 << (p & 7)
+
+    def __contains__(self, name):
+        bits = self.bits
+        return all(bits[p >> 3] & (1 << (p & 7)) for p in self._positions(name))
+
+    def save(self, path):
+        tmp = f"{path}.tmp"
+        with open(tmp, "wb") as f:
+            f.write(self._HEADER.pack(self.m, self.k, self.capacity, self.count))
+            f.write(self.bits)
+        os.replace(tmp, path)
+
+    @classmethod
+    def load(cls, path):
+        with open(path, "rb") as f:
+            m, k, capacity, count = cls._HEADER.unpack(f.read(cls._HEADER.size))
+            return cls(capacity, m=m, k=k, bits=bytearray(f.read()), count=count)
+
+
+class DeliveryHistory:
+    """Noms livrés (nom → date de première livraison), partageable entre threads."""
+
+    def __init__(self, path=HISTORY_PATH):
+        self.path = path
+        self.bloom_path = str(Path(path).with_suffix(".bloom"))
+        self.lock = threading.Lock()
+        self.db = sqlite3.connect(path, check_same_thread=False)
+        self.db.execute("PRAGMA journal_mode=WAL")
+        self.db.execute("""CREATE TABLE IF NOT EXISTS delivered (
+            name TEXT PRIMARY KEY, first_delivered TEXT) WITHOUT ROWID""")
+        self.db.execute("CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value INTEGER)")
+        self.db.execute("INSERT OR IGNORE INTO meta VALUES ('count', 0)")
+        self.db.commit()
+        self.bloom = None
+
+    def _db_count(self):
+        return self.db.execute("SELECT value FROM meta WHERE key = 'count'").fetchone()[0]
+
+    def _fresh_bloom(self):
+        """Filtre à jour avec la base : gardé, relu depuis le disque ou reconstruit."""
+        count = self._db_count()
+        if self.bloom is not None and self.bloom.count == count:
+            return self.bloom
+        if os.path.exists(self.bloom_path):
+            bloom = BloomFilter.load(self.bloom_path)
+            if bloom.count == count:
+                self.bloom = bloom
+                return bloom
+        return self._rebuild(count)
+
+    def _rebuild(self, count):
+        bloom = BloomFilter(max(MIN_CAPACITY, count * 2))
+        for (name,) in self.db.execute("SELECT name FROM delivered"):
+            bloom.add(name)
+        bloom.count = count
+        bloom.save(self.bloom_path)
+        self.bloom = bloom
+        return bloom
+
+    def __len__(self):
+        with self.lock:
+            return self._db_count()
+
+    def _lookup(self, names):
+        bloom = self._fresh_bloom()
+        maybe = list({n for n in names if n in bloom})
+        found = {}
+        for i in range(0, len(maybe), SQL_BATCH):
+            chunk = maybe[i:i + SQL_BATCH]
+            q = f"SELECT name, first_delivered FROM delivered WHERE name IN ({','.join('?' * len(chunk))})"
+            found.update(self.db.execute(q, chunk))
+        return found
+
+    def lookup(self, names):
+        """{nom: date de première livraison} pour les noms déjà livrés parmi names."""
+        with self.lock:
+            return self._lookup(names)
+
+    def record(self, names, delivered=None):
+        """Enregistre des noms livrés (les noms déjà connus gardent leur première date) ; renvoie les nouveaux."""
+        delivered = (delivered or date.today()).isoformat()
+        with self.lock:
+            names = list(dict.fromkeys(names))
+            known = self._lookup(names)
+            new = [n for n in names if n not in known]
+            with self.db:
+                self.db.executemany("INSERT INTO delivered VALUES (?, ?)", ((n, delivered) for n in new))
+                self.db.execute("UPDATE meta SET value = value + ? WHERE key = 'count'", (len(new),))
+            bloom = self.bloom
+            for name in new:
+                bloom.add(name)
+            bloom.count += len(new)
+            if bloom.count > bloom.capacity:
+                self._rebuild(bloom.count)  # filtre trop plein : taux de faux positifs en hausse
+            else:
+                bloom.save(self.bloom_path)
+            return new
+
+    def rebuild(self):
+        with self.lock:
+            return self._rebuild(self._db_count())
+
+    def close(self):
+        self.db.close()
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="Clean Masters Filename Generator — delivery history")
+    ap.add_argument("command", choices=("add", "check", "rebuild"))
+    ap.add_argument("names", nargs="?", help="noms (CSV/XLSX/JSON avec filename, ou .txt)")
+    ap.add_argument("--date", help="date de livraison (YYYY-MM-DD, défaut : aujourd'hui)")
+    ap.add_argument("--db", default=HISTORY_PATH, help="base SQLite de l'historique")
+    args = ap.parse_args(argv)
+    if args.command != "rebuild" and not args.names:
+        ap.error("names file required")
+    history = DeliveryHistory(args.db)
+    try:
+        if args.command == "rebuild":
+            bloom = history.rebuild()
+            print(f"{bloom.count} names, filter {len(bloom.bits) / 1e6:.1f} MB", file=sys.stderr)
+            return 0
+        names = read_names(args.names)
+        if args.command == "add":
+            new = history.record(names, parse_date(args.date))
+            print(f"{len(new)} new names recorded ({len(history)} in history)", file=sys.stderr)
+            return 0
+        found = history.lookup(names)
+        for name in names:
+            if name in found:
+                print(f"{name}\t{found[name]}")
+        print(f"{len(found)} of {len(names)} names already delivered", file=sys.stderr)
+        return 1 if found else 0
+    finally:
+        history.close()
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,165 @@
+"""Import en masse d'une liste de livraison (CSV, XLSX, JSON/JSONL).
+
+Les lignes sont lues d'un coup, validées colonne par colonne (champs obligatoires,
+valeurs des listes de config.ini) puis converties en entrées prêtes à ajouter.
+"""
+import csv, io, json, re
+from pathlib import Path
+from collections import defaultdict
+
+from naming import (
+    LANGUAGES, SUBTITLES, CADENCES, AUDIO_FORMATS, FIELDS, REQUIRED_FIELDS,
+    build_name, parse_date,
+)
+
+IMPORT_TYPES = ("csv", "xlsx", "json", "jsonl")
+
+# En-têtes acceptés en plus des noms de FIELDS (libellés du formulaire, variantes courantes)
+HEADER_ALIASES = {
+    "programname": "program",
+    "aspect": "videoaspect",
+    "videoresolution": "videores",
+    "resolution": "videores",
+    "lang": "language",
+    "subs": "subtitles",
+}
+_HEADER_JUNK = re.compile(r"[\s_\-*()]+")
+# Décimales fixes d'un format de nombre de tableur (« 0.00 », « #,##0.000 »…)
+_FIXED_DECIMALS = re.compile(r"\.(0+)")
+
+
+def normalize_header(name):
+    key = _HEADER_JUNK.sub("", str(name or "")).lower()
+    return HEADER_ALIASES.get(key, key)
+
+def _cell(value, field=""):
+    """Valeur de cellule → texte (les tableurs renvoient des nombres pour 25, 20, 1.85…)."""
+    if value is None:
+        return ""
+    if field == "videoaspect" and isinstance(value, float) and not value.is_integer():
+        # 2.40 revient 2.4 (tableur, JSON) : un ratio s'écrit avec deux décimales, sinon le segment devient 24
+        return f"{value:.2f}"
+    if isinstance(value, float) and value.is_integer():
+        value = int(value)
+    return value if hasattr(value, "year") else str(value).strip()
+
+
+def read_csv(data):
+    text = data.decode("utf-8-sig")
+    try:
+        dialect = csv.Sniffer().sniff(text[:4096], delimiters=",;\t")
+    except csv.Error:  # une seule colonne, fichier vide…
+        dialect = csv.excel
+    return list(csv.DictReader(io.StringIO(text), dialect=dialect))
+
+def read_json(data):
+    text = data.decode("utf-8-sig").strip()
+    if text.startswith("["):
+        return json.loads(text)
+    return [json.loads(line) for line in text.splitlines() if line.strip()]
+
+def read_xlsx(data):
+    try:
+        from openpyxl import load_workbook
+    except ImportError:
+        raise ValueError("XLSX import needs openpyxl (pip install openpyxl)")
+    wb = load_workbook(io.BytesIO(data), read_only=True, data_only=True)
+    try:
+        it = wb.active.iter_rows()
+        header = [c.value for c in next(it, None) or ()]
+        # Seul le ratio garde ses zéros : une cadence ou un format audio au format 0.00 resterait « 25.00 »
+        aspect = [normalize_header(h) == "videoaspect" for h in header]
+        # zip s'arrête à la dernière colonne d'en-tête, comme dict(zip(header, row))
+        rows = ([_xlsx_value(c) if fixed else c.value for c, fixed in zip(row, aspect)] for row in it)
+        return [dict(zip(header, row)) for row in rows if any(v is not None for v in row)]
+    finally:
+        wb.close()
+
+def _xlsx_value(cell):
+    """Valeur d'une cellule de ratio ; un nombre à décimales fixes (format 0.00) garde ses zéros : « 2.40 »."""
+    value = cell.value
+    fmt = getattr(cell, "number_format", None) or ""
+    if isinstance(value, float) and "%" not in fmt and "E" not in fmt.upper():
+        m = _FIXED_DECIMALS.search(fmt)
+        if m:
+            return f"{value:.{len(m.group(1))}f}"
+    return value
+
+def read_rows(data, kind):
+    """Octets d'un fichier → liste de dicts bruts."""
+    readers = {"csv": read_csv, "xlsx": read_xlsx, "json": read_json, "jsonl": read_json}
+    if kind not in readers:
+        raise ValueError(f"unsupported file type: {kind}")
+    return readers[kind](data)
+
+def read_names(path):
+    """Noms de fichiers depuis un CSV/XLSX/JSON (colonne filename) ou un fichier texte (un par ligne)."""
+    kind = Path(path).suffix.lower().lstrip(".")
+    data = Path(path).read_bytes()
+    if kind == "txt":
+        return [l.strip() for l in data.decode("utf-8-sig").splitlines() if l.strip()]
+    return [str(r.get("filename") or "").strip() for r in read_rows(data, kind) if r.get("filename")]
+
+
+def validate_rows(rows, file_formats, video_formats):
+    """Valide toutes les lignes colonne par colonne.
+
+    Renvoie (valides, erreurs) : valides = [(numéro de ligne, args pour build_name, description)],
+    erreurs = [(numéro de ligne, message)] ; les numéros commencent à 1 (hors en-tête).
+    """
+    # JSON : un enregistrement qui n'est pas un objet est une ligne en erreur, pas un échec de l'import
+    not_objects = [i for i, r in enumerate(rows) if not isinstance(r, dict)]
+    rows = [{h: _cell(v, h) for h, v in ((normalize_header(k), v) for k, v in r.items())}
+            if isinstance(r, dict) else {} for r in rows]
+    columns = {f: [r.get(f, "") for r in rows] for f in FIELDS + ("description",)}
+    problems = defaultdict(list)
+
+    for f in REQUIRED_FIELDS:
+        for i, v in enumerate(columns[f]):
+            if not v:
+                problems[i].append(f"{f} is required")
+
+    allowed = {
+        "language": {c for c, _ in LANGUAGES},
+        "subtitles": {c for c, _ in SUBTITLES},
+        "fileformat": set(file_formats),
+        "videoformat": set(video_formats),
+        "cadence": set(CADENCES),
+        "audioformat": {c for c, _ in AUDIO_FORMATS},
+    }
+    for f, ok in allowed.items():
+        for i, v in enumerate(columns[f]):
+            if v and v not in ok:
+                problems[i].append(f"{f} {v!r} is not in the allowed list")
+
+    dates = []
+    for i, v in enumerate(columns["date"]):
+        try:
+            dates.append(parse_date(v))
+        except ValueError:
+            dates.append(None)
+            problems[i].append(f"date {v!r} is not YYYY-MM-DD")
+    columns["date"] = dates
+    for i in not_objects:
+        problems[i] = ["record must be a JSON object"]
+
+    valid, errors = [], []
+    for i in range(len(rows)):
+        if i in problems:
+            errors.append((i + 1, "; ".join(problems[i])))
+        else:
+            valid.append((i + 1, [columns[f][i] for f in FIELDS], str(columns["description"][i])))
+    return valid, errors
+
+def import_file(data, kind, file_formats, video_formats, build=build_name):
+    """Lit, valide et construit les noms : (entrées (filename, segments, description), erreurs, programme).
+
+    build remplace naming.build_name (même signature), par exemple une version chronométrée.
+    """
+    valid, errors = validate_rows(read_rows(data, kind), file_formats, video_formats)
+    entries = []
+    for _, args, description in valid:
+        fname, typed = build(*args)
+        entries.append((fname, typed, description))
+    program = valid[0][1][FIELDS.index("program")] if valid else ""
+    return entries, errors, program
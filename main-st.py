@@ -1,255 +1,168 @@
 import streamlit as st
-import streamlit.components.v1 as components
-import configparser, os, re
 from datetime import datetime, date
-from io import BytesIO
-from reportlab.pdfgen import canvas
-from reportlab.lib.pagesizes import A4
-import json, html
-import base64
+import hashlib, io, threading
+from collections import OrderedDict
 from pathlib import Path
 
+from naming import (
+    LANGUAGES, SUBTITLES, CADENCES, AUDIO_FORMATS,
+    load_config, read_config, build_name, get_nomenclature, sanitize,
+)
+from entry_store import EntryStore
+from entry_db import EntryDatabase, SqliteEntryStore, load_storage, new_list_id
+from entries_list import entries_list, apply_deltas, DESCRIPTION_MAX_CHARS
+from importer import IMPORT_TYPES, import_file, read_rows
+from rename import write_template
+from checksum import (
+    CACHE_PATH, available_algorithms, find_files, hash_files, checksum_labels, write_manifest, Cache,
+)
+from history import DeliveryHistory
+from assets import LOGO_PATH, png_data_uri
+import matrix
+import metrics
+
 
 # -------- Helpers --------
-def load_config():
-    cfg_path = "config.ini"
-    if not os.path.exists(cfg_path):
-        cp = configparser.ConfigParser()
-        cp["formats"] = {
-            "file_formats": "MOV, MXF, MP4, AVI, ProRes, DNxHD",
-            "video_formats": "SD, HD, 4K",
-        }
-        with open(cfg_path, "w", encoding="utf-8") as f:
-            cp.write(f)
-
-    cp = configparser.ConfigParser()
-    cp.read(cfg_path, encoding="utf-8")
-    file_formats = [s.strip() for s in cp.get("formats", "file_formats").split(",") if s.strip()]
-    video_formats = [s.strip() for s in cp.get("formats", "video_formats").split(",") if s.strip()]
-    return file_formats, video_formats
-
-LANGUAGES = [
-    ("FR","Français"), ("ES","Espagnol"), ("EN","Anglais"), ("HI","Hindi"),
-    ("AR","Arabe"), ("BN","Bengali"), ("PT","Portugais"), ("RU","Russe"),
-    ("JA","Japonais"), ("PA","Pendjabi"), ("MR","Marathi"), ("TE","Télougou"),
-    ("VI","Vietnamien"), ("KO","Coréen"), ("ZH","Mandarin"), ("DE","Allemand"),
-    ("TA","Tamoul"), ("UR","Ourdou"), ("JV","Javanais"), ("IT","Italien")
-]
-SUBTITLES = LANGUAGES + [("NOSUB", "NoSub")]
-CADENCES = ["", "23.976", "24", "25", "29.97", "30", "50", "59.94"]
-AUDIO_FORMATS = [("20", "Stereo"), ("51", "Surround"), ("71", "7.1 Surround"), ("10", "Mono"), ("NOAUDIO", "No Audio Track")]
-
-
-def renumber_entries():
-    """Force les IDs à 01, 02, 03… selon l’ordre actuel de st.session_state.entries."""
-    for idx, entry in enumerate(st.session_state.entries):
-        entry["id"] = f"{idx+1:02d}"
-
-def sanitize(text: str) -> str:
-    if not text: return ""
-    tmp = re.sub(r"[^A-Za-z0-9\s]+", "", text)
-    return re.sub(r"_+", "_", tmp.strip().replace(" ", "_"))
-
-def build_filename(program, version, dt, language, subtitles, fileformat, videoformat,
-                   videoaspect_raw, videores, cadence, audioformat, audiocodec):
-    program = sanitize(program)
-    version = sanitize(version)
-    audiocodec = sanitize(audiocodec)
-    videores = sanitize(videores)
-    date_code = dt.strftime("%y%m%d") if isinstance(dt, date) else datetime.now().strftime("%y%m%d")
-    videoaspect = re.sub(r"[.,]", "", videoaspect_raw or "")
-    if subtitles == "NOSUB":
-        sub_seg = "NOSUB"
-    elif subtitles:
-        sub_seg = f"ST{subtitles}"
-    else:
-        sub_seg = ""
-    segments = [program]
-    if version: segments.append(version)
-    lang_seg = f"{language}-{sub_seg}" if sub_seg else language
-    segments.append(lang_seg)
-    segments += [fileformat, videoformat, videoaspect, videores, cadence, audioformat, audiocodec, date_code]
-    return "_".join(seg for seg in segments if seg)
+@st.cache_resource
+def entry_database(path):
+    """Base des listes (backend sqlite), une connexion partagée par toutes les sessions."""
+    return EntryDatabase(path)
 
 def ensure_state():
-    for k, v in (("entries", []), ("id_counter", 0), ("program_name", "")):
-        if k not in st.session_state: st.session_state[k] = v
-
-def next_id():
-    st.session_state.id_counter += 1
-    return f"{st.session_state.id_counter:02d}"
-
-def pdf_bytes(entries, program):
-    today = datetime.now().strftime("%Y%m%d")
-    buf = BytesIO()
-    c = canvas.Canvas(buf, pagesize=A4)
-    w, h = A4
-
-    # Titre (avec logo si dispo)
-    y = h - 80
-    logo_path = "logo.png"
-    if os.path.exists(logo_path):
-        c.drawImage(logo_path, 40, y - 20, width=50, height=50, mask='auto', preserveAspectRatio=True)
-    c.setFont("Helvetica-Bold", 16)
-    c.drawString(100, y, f"EXPORT LIST {sanitize(program)} {today}")
-    y -= 40
-
-    pad = 12
-    vpad_bottom = 10
-    corner = 10
-    shadow_offset = 2
-    icon_path = "file-icon.png"
-    icon_w, icon_h = 26, 26  # icône un peu plus grosse
-
-    for e in entries:
-        # --- Calcule les positions de texte pour connaître la hauteur utile ---
-        has_desc = bool((e.get("description") or "").strip())
-        # Baselines texte (plus bas = plus petit en Y)
-        filename_y = y - pad - 6
-        desc_y     = y - pad - 24 if has_desc else filename_y
-
-        # Bloc icône + ID
-        icon_x = 40 + pad
-        icon_y = y - pad - icon_h            # top-align de l’icône
-        has_id = bool((e.get("id") or "").strip())
-        id_y   = icon_y - 10 if has_id else icon_y  # ID situé sous l’icône
-
-        # Le point le plus bas du contenu (le plus petit Y)
-        content_bottom_y = min(desc_y, id_y)
-
-        # Hauteur de carte dynamique (avec marge basse)
-        card_h = (y - (content_bottom_y - vpad_bottom))
-        # Garde-fous sur la hauteur
-        if card_h < 48:
-            card_h = 48
-
-        # Saut de page si besoin
-        if y - card_h < 60:
-            c.showPage()
-            y = h - 80
-            c.setFont("Helvetica-Bold", 16)
-            c.drawString(40, y, f"EXPORT LIST {sanitize(program)} {today}")
-            y -= 40
-            # Recalcule baselines avec le nouveau y
-            filename_y = y - pad - 6
-            desc_y     = y - pad - 24 if has_desc else filename_y
-            icon_y     = y - pad - icon_h
-            id_y       = icon_y - 10 if has_id else icon_y
-            content_bottom_y = min(desc_y, id_y)
-            card_h = (y - (content_bottom_y - vpad_bottom))
-            if card_h < 48:
-                card_h = 48
-
-        x = 40
-        card_w = w - 2 * x
-
-        # --- Ombre légère (offset) ---
-        c.setFillColorRGB(0.85, 0.87, 0.92)
-        c.roundRect(x + shadow_offset, y - card_h - shadow_offset, card_w, card_h, corner, fill=True, stroke=False)
-
-        # --- Carte blanche moderne + bordure subtile ---
-        c.setFillColorRGB(1, 1, 1)
-        c.roundRect(x, y - card_h, card_w, card_h, corner, fill=True, stroke=False)
-        c.setStrokeColorRGB(0.88, 0.88, 0.92)
-        c.roundRect(x, y - card_h, card_w, card_h, corner, fill=False, stroke=True)
-
-        # --- Icône fichier (image png) ---
-        if os.path.exists(icon_path):
-            c.drawImage(icon_path, icon_x, icon_y, width=icon_w, height=icon_h, mask='auto', preserveAspectRatio=True)
+    if "entries" not in st.session_state:
+        sep = get_nomenclature().separator
+        backend, db_path = load_storage()
+        if backend == "sqlite":
+            # La liste est retrouvée après un rechargement grâce à son identifiant dans l'URL
+            list_id = st.query_params.get("list") or new_list_id()
+            st.query_params["list"] = list_id
+            st.session_state.entries = SqliteEntryStore(entry_database(db_path), list_id, sep)
         else:
-            # Fallback simple si l’icône manque
-            c.setFillColorRGB(1.0, 0.84, 0.0)
-            c.rect(icon_x, icon_y, icon_w, icon_h, fill=True, stroke=False)
-        c.setFillColorRGB(0, 0, 0)
-
-        # --- ID sous l’icône, centré (sans libellé) ---
-        if has_id:
-            id_text = str(e.get('id', '')).strip()
-            c.setFont("Helvetica", 9)
-            c.setFillColorRGB(0.35, 0.40, 0.55)
-            tw = c.stringWidth(id_text, "Helvetica", 9)
-            cx = icon_x + icon_w / 2.0
-            c.drawString(cx - tw / 2.0, icon_y - 10, id_text)
-            c.setFillColorRGB(0, 0, 0)
-
-        # --- Texte à droite de l’icône ---
-        tx = icon_x + icon_w + pad
-        c.setFont("Helvetica-Bold", 12)
-        c.drawString(tx, filename_y, (e.get("filename", ""))[:80])
-
-        c.setFont("Helvetica-Oblique", 10)
-        c.setFillColorRGB(0.2, 0.2, 0.2)
-        if has_desc:
-            c.drawString(tx, desc_y, (e.get("description", ""))[:90])
-        c.setFillColorRGB(0, 0, 0)
-
-        # Avance pour la carte suivante
-        y -= (card_h + pad)
-
-    c.save()
-    buf.seek(0)
-    return buf.getvalue(), f"{sanitize(program)}_{today}_export_list.pdf"
-
-
-
-def bitrate_h264_high(mbps: float, total_sec: int):
-    size_mb = (mbps * total_sec) / 8
-    size_gb = size_mb / 1024
-    return size_mb*1.01, size_gb*1.01  # +1% overhead conteneur
-
-
-
-def build_typed_segments(program, version, form_date, language, subtitles,
-                         fileformat, videoformat, videoaspect, videores,
-                         cadence, audioformat, audiocodec):
-    prog = sanitize(program)
-    vers = sanitize(version)
-    date_code = form_date.strftime("%y%m%d")
-    videoaspect_clean = re.sub(r"[.,]", "", videoaspect or "")
-    videores_clean = sanitize(videores)
-    audiocodec_clean = sanitize(audiocodec)
-
-    if subtitles == "NOSUB":
-        sub_seg = "NOSUB"
-    elif subtitles:
-        sub_seg = f"ST{subtitles}"
-    else:
-        sub_seg = ""
-    lang_seg = f"{language}-{sub_seg}" if sub_seg else language
-
-    typed = [("PROGRAM", prog)]
-    if vers:
-        typed.append(("VERSION", vers))
-    typed += [
-        ("LANG_SUB",     lang_seg),
-        ("FILE_FORMAT",  fileformat),
-        ("VIDEO_FORMAT", videoformat),
-    ]
-    if videoaspect_clean:
-        typed.append(("VIDEO_ASPECT", videoaspect_clean))
-    if videores_clean:
-        typed.append(("RESOLUTION",   videores_clean))
-    if cadence:
-        typed.append(("CADENCE",      cadence))
-    typed.append(("AUDIO_FORMAT", audioformat))
-    if audiocodec_clean:
-        typed.append(("AUDIO_CODEC",  audiocodec_clean))
-    typed.append(("DATE", date_code))
-    return typed
-
-
+            st.session_state.entries = EntryStore(sep)
+    if "program_name" not in st.session_state:
+        st.session_state.program_name = st.session_state.entries.program
+
+# Nombre de modèles de mapping (CSV) gardés en cache
+TEMPLATE_CACHE_ENTRIES = 32
+# Budget mémoire du cache de PDF si [cache] pdf_cache_mb est absent de config.ini
+PDF_CACHE_MB = 256
+
+# Logo de l'en-tête : affiché en 64 px max, envoyé en 128 px (écrans haute densité)
+LOGO_HEADER_PX = 128
+
+# Au-delà, l'export CSV de la matrice passe par matrix.py (le bouton de téléchargement tient tout en mémoire)
+MATRIX_EXPORT_MAX_ROWS = 100_000
+
+# Types de segments proposés comme filtres au-dessus de la liste
+FACET_TYPES = ("LANG_SUB", "FILE_FORMAT", "VIDEO_FORMAT", "CADENCE", "AUDIO_FORMAT")
+
+@st.cache_resource
+def delivery_history():
+    """Historique des noms livrés, partagé par toutes les sessions du serveur."""
+    return DeliveryHistory()
+
+def entries_digest(entries, program, checksums=None):
+    """Empreinte du contenu exporté (ID, nom, description, checksum + programme)."""
+    checksums = checksums or {}
+    h = hashlib.blake2b(digest_size=16)
+    h.update(str(program).encode("utf-8"))
+    for display_id, e in entries.numbered():
+        for v in (display_id, e.filename, e.description, checksums.get(e.filename, "")):
+            h.update(b"\0")
+            h.update(v.encode("utf-8"))
+        h.update(b"\1")
+    return h.hexdigest()
+
+# Appels chronométrés (histogrammes de metrics, panneau d'admin ?admin=1)
+timed_build_name = metrics.timed("build_filename")(build_name)
+
+@st.cache_resource
+def metrics_server(port):
+    """Serveur GET /metrics (texte Prometheus) du processus, lancé une fois ; None si le port est pris."""
+    try:
+        return metrics.serve(port)
+    except OSError:
+        return None
+
+class PdfCache:
+    """LRU de PDF bornée en octets (un PDF de grosse liste pèse des dizaines de Mo).
+
+    Les moins récents sont évincés jusqu'à repasser sous max_bytes ; un PDF plus gros que le budget n'est pas gardé.
+    """
+
+    def __init__(self, max_bytes):
+        self.max_bytes = max_bytes
+        self.size = 0
+        self._items = OrderedDict()  # clé -> (pdf, nom du fichier)
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            item = self._items.get(key)
+            if item is not None:
+                self._items.move_to_end(key)
+            return item
+
+    def put(self, key, data, fname):
+        if len(data) > self.max_bytes:
+            return
+        with self._lock:
+            old = self._items.pop(key, None)
+            if old is not None:
+                self.size -= len(old[0])
+            self._items[key] = (data, fname)
+            self.size += len(data)
+            while self.size > self.max_bytes:
+                evicted, _ = self._items.popitem(last=False)[1]
+                self.size -= len(evicted)
+
+@st.cache_resource
+def pdf_cache():
+    """Cache des PDF, partagé par toutes les sessions du serveur."""
+    mb = read_config().getfloat("cache", "pdf_cache_mb", fallback=PDF_CACHE_MB)
+    return PdfCache(int(mb * 1024 * 1024))
+
+def cached_pdf(digest, day, program, entries, checksums=None):
+    """PDF mis en cache sur l'empreinte du contenu (et le jour, imprimé dans le titre)."""
+    key = (digest, day, program)
+    cache = pdf_cache()
+    hit = cache.get(key)
+    if hit is not None:
+        return hit
+    # ReportLab (et pypdf) ne sont chargés qu'au premier export, pas au démarrage de l'app
+    from pdf_export import pdf_bytes
+    rows = entries.export_rows()
+    if checksums:
+        for r in rows:
+            r["checksum"] = checksums.get(r["filename"], "")
+    with metrics.timer("pdf_bytes"):
+        data, fname = pdf_bytes(rows, program)
+    cache.put(key, data, fname)
+    return data, fname
+
+@st.cache_data(max_entries=TEMPLATE_CACHE_ENTRIES, show_spinner=False)
+def cached_template(digest, _entries):
+    """Modèle de mapping pour rename.py, sur la même empreinte que le PDF."""
+    out = io.StringIO()
+    write_template(out, _entries.export_rows())
+    return out.getvalue()
 
 
 
 # -------- UI --------
+# Chaque section du script est une phase du rerun (rerun.lap) ; « Profile next rerun » passe le suivant sous cProfile
+rerun = metrics.Rerun(st.session_state)
 st.set_page_config(page_title="Clean Masters Filename Generator", layout="wide")
 ensure_state()
 file_formats, video_formats = load_config()
-
-# Affichage logo + titre (logo centré verticalement, hauteur max)
-logo_path = Path("logo.png")
-if logo_path.exists():
-    logo_b64 = base64.b64encode(logo_path.read_bytes()).decode()
+metrics_port = metrics.configured_port()
+if metrics_port:
+    metrics_server(metrics_port)
+rerun.lap("config")
+
+# Affichage logo + titre (logo centré verticalement, hauteur max) ; image réduite et encodée une fois par processus
+logo_uri = png_data_uri(LOGO_PATH, LOGO_HEADER_PX)
+if logo_uri:
     st.markdown(
         f"""
         <style>
@@ -269,7 +182,7 @@ if logo_path.exists():
           }}
         </style>
         <div class="app-header">
-          <img src="data:image/png;base64,{logo_b64}" alt="Logo">
+          <img src="{logo_uri}" alt="Logo">
           <h1>Clean Masters Filename Generator</h1>
         </div>
         """,
@@ -277,6 +190,7 @@ if logo_path.exists():
     )
 else:
     st.title("Clean Masters Filename Generator")
+rerun.lap("header")
 
 with st.form("form"):
     col1, col2, col3 = st.columns([1,1,1])
@@ -307,144 +221,241 @@ with st.form("form"):
         if not required_ok:
             st.error("Please fill all required fields (*)")
         else:
-            fname = build_filename(
-                program, version, form_date, language, subtitles, fileformat, videoformat,
-                videoaspect, videores, cadence, audioformat, audiocodec
-            )
-            typed = build_typed_segments(
+            fname, typed = timed_build_name(
                 program, version, form_date, language, subtitles, fileformat, videoformat,
                 videoaspect, videores, cadence, audioformat, audiocodec
             )
-            st.session_state.program_name = program
-            st.session_state["id_counter"] = st.session_state.get("id_counter", 0) + 1
-            st.session_state.entries.append({
-                "id": "",  # placeholder, on renumérote juste après
-                "filename": fname,
-                "description": description or "",
-                "segments": typed,
-            })
-            renumber_entries()
-            st.success("Entry added.")
-
+            st.session_state.program_name = st.session_state.entries.program = program
+            if st.session_state.entries.has_filename(fname):
+                st.warning("This filename is already in the list; not added.")
+            else:
+                st.session_state.entries.add(fname, typed, description or "")
+                st.success("Entry added.")
+                delivered = delivery_history().lookup([fname])
+                if delivered:
+                    st.warning(f"Already delivered on {delivered[fname]}.")
+rerun.lap("form")
+
+
+with st.expander("Import delivery list (CSV / XLSX / JSON)"):
+    st.caption("Columns: program, version, date (YYYY-MM-DD), language, subtitles, fileformat, videoformat, "
+               "videoaspect, videores, cadence, audioformat, audiocodec, description")
+    upload = st.file_uploader("Delivery list", type=list(IMPORT_TYPES), label_visibility="collapsed")
+    if upload is not None and st.button("Import rows"):
+        kind = upload.name.rsplit(".", 1)[-1].lower()
+        try:
+            rows, errors, imported_program = import_file(upload.getvalue(), kind, file_formats, video_formats,
+                                                          build=timed_build_name)
+        except ValueError as exc:
+            st.error(f"Import failed: {exc}")
+        else:
+            # Noms déjà dans la liste ou répétés dans le fichier : ignorés
+            entries, seen, fresh = st.session_state.entries, set(), []
+            for fname, typed, desc in rows:
+                if not entries.has_filename(fname) and fname not in seen:
+                    seen.add(fname)
+                    fresh.append((fname, typed, desc[:DESCRIPTION_MAX_CHARS]))
+            # Une seule mise à jour de l'état puis un seul rerun pour tout le fichier
+            entries.extend(fresh)
+            if fresh and not st.session_state.program_name:
+                st.session_state.program_name = entries.program = imported_program
+            delivered = delivery_history().lookup(seen)
+            st.session_state.import_report = (len(fresh), errors, len(rows) - len(fresh), len(delivered))
+            st.rerun()
+    report = st.session_state.pop("import_report", None)
+    if report:
+        added, errors, duplicates, delivered = report
+        st.success(f"{added} entries imported.")
+        if duplicates:
+            st.warning(f"{duplicates} duplicate filename(s) skipped (already in the list or repeated in the file).")
+        if delivered:
+            st.warning(f"{delivered} imported filename(s) were already delivered before.")
+        if errors:
+            st.error(f"{len(errors)} rows rejected:")
+            st.dataframe([{"row": n, "error": msg} for n, msg in errors], use_container_width=True, hide_index=True)
+rerun.lap("import")
+
+
+with st.expander("Delivery matrix (languages × subtitles × formats)"):
+    m1, m2, m3 = st.columns([1, 1, 1])
+    m_program = m1.text_input("PROGRAM NAME", value=st.session_state.program_name, key="mx_program")
+    m_version = m2.text_input("VERSION", key="mx_version")
+    m_date = m3.date_input("DATE", value=date.today(), format="YYYY-MM-DD", key="mx_date")
+    m4, m5, m6 = st.columns([1, 1, 1])
+    m_langs = m4.multiselect("LANGUAGES", [c for c, _ in LANGUAGES], key="mx_langs")
+    m_subs = m5.multiselect("SUBTITLES", [c for c, _ in SUBTITLES], key="mx_subs")
+    m_files = m6.multiselect("FILE FORMATS", file_formats, key="mx_files")
+    m7, m8, m9 = st.columns([1, 1, 1])
+    m_videos = m7.multiselect("VIDEO FORMATS", video_formats, key="mx_videos")
+    m_cadences = m8.multiselect("CADENCES", [c for c in CADENCES if c], key="mx_cadences")
+    m_audios = m9.multiselect("AUDIO FORMATS", [c for c, _ in AUDIO_FORMATS], key="mx_audios")
+    m_rules = st.text_area("Exclusions (one rule per line, ex: subtitles=NOSUB & fileformat=DCP)", key="mx_rules")
+
+    spec = {
+        "program": m_program, "version": m_version, "date": m_date,
+        "language": m_langs, "subtitles": m_subs, "fileformat": m_files,
+        "videoformat": m_videos, "cadence": m_cadences, "audioformat": m_audios,
+    }
+    try:
+        rules = [matrix.parse_rule(line) for line in m_rules.splitlines() if line.strip()]
+    except ValueError as exc:
+        st.error(str(exc))
+        rules = None
+    if rules is not None and m_program and all([m_langs, m_subs, m_files, m_videos, m_audios]):
+        # Le nombre est connu avant toute génération ; seules la page affichée et l'export sont produits
+        total = matrix.count(spec, rules)
+        st.metric("Combinations", f"{total:,}")
+        page_size = 50
+        pages = max(1, -(-total // page_size))
+        page_no = st.number_input(f"Page (1–{pages})", min_value=1, max_value=pages, value=1, step=1, key="mx_page")
+        st.dataframe([{"filename": fname} for fname, _ in matrix.page(spec, rules, page_no - 1, page_size)],
+                     use_container_width=True, hide_index=True)
+        if total > MATRIX_EXPORT_MAX_ROWS:
+            # download_button garde tout le fichier en mémoire : au-delà, export en flux par la CLI
+            st.caption(f"More than {MATRIX_EXPORT_MAX_ROWS:,} combinations: export them with "
+                       "`python matrix.py spec.json > matrix.csv` (streamed, constant memory).")
+        elif total and st.button("Build CSV export", key="mx_export"):
+            out = io.StringIO()
+            matrix.write_csv(out, spec, rules)
+            st.download_button("Download matrix CSV", data=out.getvalue(), mime="text/csv",
+                               file_name=f"{m_program}_{m_date:%Y%m%d}_matrix.csv")
+    else:
+        st.caption("Program name and at least one value per field (except cadence) are required.")
+rerun.lap("matrix")
 
 
 st.subheader("Entries")
 if not st.session_state.entries:
     st.caption("Aucune entrée pour l’instant.")
 else:
-    TYPE_COLORS = {
-        "PROGRAM":      "#1565C0",
-        "VERSION":      "#6A1B9A",
-        "LANG_SUB":     "#2E7D32",
-        "FILE_FORMAT":  "#EF6C00",
-        "VIDEO_FORMAT": "#00838F",
-        "VIDEO_ASPECT": "#AD1457",
-        "RESOLUTION":   "#283593",
-        "CADENCE":      "#6D4C41",
-        "AUDIO_FORMAT": "#C62828",
-        "AUDIO_CODEC":  "#455A64",
-        "DATE":         "#4FC3F7",  # bleu clair fixe
-    }
-    renumber_entries()
-    to_delete = []
-    for i, e in enumerate(st.session_state.entries):
-        col_name, col_desc, col_del = st.columns([6, 4, 1])
-
-        # --- Nom coloré par TYPE + Copier à côté, avec animation ---
-        with col_name:
-            seglist = e.get("segments", [])
-            if not seglist:
-                # si vieilles entrées sans 'segments', on ne colore pas correctement (tout serait bleu) :
-                # supprime-les et ré-ajoute-les pour bénéficier des couleurs fixes
-                seglist = [("PROGRAM", part) for part in e["filename"].split("_")]
-
-            colored_parts = []
-            for t, val in seglist:
-                color = TYPE_COLORS.get(t, "#111")
-                colored_parts.append(
-                    f"<span style='color:{color};font-weight:600'>{html.escape(str(val))}</span>"
-                )
-            colored_html = "_".join(colored_parts)
-
-            btn_id = f"copybtn_{e['id']}"
-            copy_text = json.dumps(e["filename"])
-
-            components.html(
-                f"""
-                <style>
-                  .copy-btn {{
-                    padding:6px 12px; border:1px solid #999; border-radius:8px; background:#f8f9fa; cursor:pointer;
-                    transition: background 0.25s, transform 0.08s;
-                    font-family: system-ui, -apple-system, Segoe UI, Roboto, sans-serif;
-                    white-space:nowrap;
-                  }}
-                  .copy-btn:active {{ transform: scale(0.98); }}
-                  .copied-anim {{ animation: pulseCopy 700ms ease; }}
-                  @keyframes pulseCopy {{
-                    0%   {{ background:#f8f9fa; }}
-                    40%  {{ background:#c8f7d0; }}
-                    100% {{ background:#f8f9fa; }}
-                  }}
-                </style>
-                <div style="display:flex;align-items:center;gap:10px;flex-wrap:nowrap;min-width:0;">
-                  <div style="font-family:monospace;font-size:0.95rem;white-space:nowrap;overflow:hidden;text-overflow:ellipsis;">
-                    {colored_html}
-                  </div>
-                  <button id="{btn_id}" class="copy-btn" aria-label="Copier">Copier</button>
-                </div>
-                <script>
-                  (function(){{
-                    var btn = document.getElementById("{btn_id}");
-                    if(!btn) return;
-                    btn.addEventListener("click", function(){{
-                      navigator.clipboard.writeText({copy_text}).then(function(){{
-                        btn.classList.remove("copied-anim");
-                        void btn.offsetWidth;
-                        btn.classList.add("copied-anim");
-                        var old = btn.textContent;
-                        btn.textContent = "Copié ✓";
-                        setTimeout(function(){{ btn.textContent = "Copier"; }}, 900);
-                      }});
-                    }});
-                  }})();
-                </script>
-                """,
-                height=46,
-            )
-
-        # --- Description à droite (placeholder, max 50, pas d’étiquette) ---
-        with col_desc:
-            new_desc = st.text_input(
-                label="",
-                value=e.get("description",""),
-                key=f"desc_{e['id']}",
-                max_chars=50,
-                placeholder="Description (max 50)",
-                label_visibility="collapsed",
-            )
-            st.session_state.entries[i]["description"] = new_desc
-
-        # --- Supprimer (même ligne) ---
-        with col_del:
-            if st.button("Supprimer", key=f"del_{e['id']}"):
-                to_delete.append(i)
-
-    if to_delete:
-        for idx in reversed(to_delete):
-            st.session_state.entries.pop(idx)
-        renumber_entries()
-        st.rerun()
+    entries = st.session_state.entries
+    shown = None
+    # L'index n'est construit qu'à la première recherche, puis mis à jour à chaque modification
+    if st.toggle("Search / filter", key="search_on"):
+        index = entries.search_index()
+        search_text = st.text_input("Search", placeholder="filename or description, e.g. prores 4444 uhd",
+                                    key="search_text", label_visibility="collapsed")
+        filters = {t: st.session_state.get(f"facet_{t}", []) for t in FACET_TYPES}
+        counts = index.facets(FACET_TYPES, search_text, filters)
+        for col, t in zip(st.columns(len(FACET_TYPES)), FACET_TYPES):
+            options = list(counts[t]) + [v for v in filters[t] if v not in counts[t]]
+            col.multiselect(t.replace("_", " ").title(), options=options, key=f"facet_{t}",
+                            format_func=lambda v, c=counts[t]: f"{v} ({c.get(v, 0)})")
+        shown = index.query(search_text, filters)
+        if shown is not None:
+            st.caption(f"{len(shown)} of {len(entries)} entries match.")
+    rerun.lap("search")
+    # Un seul composant pour toute la liste (ou les seules lignes trouvées) ; il renvoie des lots de modifications
+    with metrics.timer("entries_list"):
+        batch = entries_list(entries, keys=shown)
+    if batch and batch.get("id") != st.session_state.get("entries_batch"):
+        st.session_state.entries_batch = batch["id"]
+        if apply_deltas(st.session_state.entries, batch.get("ops", [])):
+            st.rerun()
+rerun.lap("entries")
 
 
 
 # Export PDF
 st.divider()
 if st.session_state.entries:
-    renumber_entries()
-    data, fname = pdf_bytes(st.session_state.entries, st.session_state.get("program_name", "PROGRAM"))
-    st.download_button("Export PDF Report", data=data, file_name=fname, mime="application/pdf")
-
-
+    program_name = st.session_state.get("program_name", "PROGRAM")
+
+    with st.expander("Checksums (xxHash / MD5 / SHA-256)"):
+        roots_text = st.text_area("Folders containing the masters (one per line)", key="ck_roots")
+        algo = st.selectbox("Algorithm", available_algorithms(), index=None, placeholder="Choose…", key="ck_algo")
+        if st.button("Compute checksums", disabled=not (roots_text.strip() and algo)):
+            roots = [r.strip() for r in roots_text.splitlines() if r.strip()]
+            bad = [r for r in roots if not Path(r).is_dir()]
+            if bad:
+                st.error("Folder(s) not found: " + ", ".join(bad))
+            else:
+                found = find_files(roots, [e.filename for e in st.session_state.entries])
+                paths = [p for ps in found.values() for p in ps]
+                digests, errors = {}, []
+                progress = st.progress(0.0, text=f"Hashing {len(paths)} files…")
+                # Fichiers inchangés (chemin, taille, mtime) : empreinte relue dans le cache
+                cache = Cache(CACHE_PATH)
+                try:
+                    for n, (path, digest, _, error) in enumerate(hash_files(paths, algo, cache=cache), 1):
+                        if error:
+                            errors.append({"file": path, "error": error})
+                        else:
+                            digests[path] = digest
+                        progress.progress(n / len(paths), text=f"Hashing {n}/{len(paths)} files…")
+                finally:
+                    cache.close()
+                progress.empty()
+                manifest = io.StringIO()
+                write_manifest(manifest, digests, base=roots[0] if len(roots) == 1 else None)
+                st.session_state.checksums = checksum_labels(found, digests, algo)
+                st.session_state.checksum_manifest = (manifest.getvalue(), algo)
+                st.session_state.checksum_errors = errors
+        if st.session_state.get("checksum_errors"):
+            st.warning(f"{len(st.session_state.checksum_errors)} file(s) could not be read; "
+                       "they are left out of the manifest and the PDF report.")
+            st.dataframe(st.session_state.checksum_errors, use_container_width=True, hide_index=True)
+        if st.session_state.get("checksum_manifest"):
+            manifest, manifest_algo = st.session_state.checksum_manifest
+            found_n = sum(e.filename in st.session_state.checksums for e in st.session_state.entries)
+            st.caption(f"{found_n} of {len(st.session_state.entries)} entries matched; "
+                       "checksums are printed in the PDF report.")
+            st.download_button("Download manifest", data=manifest, mime="text/plain",
+                               file_name=f"{sanitize(program_name or 'PROGRAM')}_{datetime.now():%Y%m%d}.{manifest_algo}")
+
+    checksums = st.session_state.get("checksums")
+    with metrics.timer("entries_digest"):
+        digest = entries_digest(st.session_state.entries, program_name, checksums)
+    # Le PDF n'est généré qu'à la demande ; une liste inchangée n'est jamais rendue deux fois
+    if st.session_state.get("pdf_digest") == digest or st.button("Build PDF Report"):
+        st.session_state.pdf_digest = digest
+        data, fname = cached_pdf(digest, datetime.now().strftime("%Y%m%d"), program_name,
+                                 st.session_state.entries, checksums)
+        st.download_button("Export PDF Report", data=data, file_name=fname, mime="application/pdf")
+    if st.button("Mark list as delivered"):
+        new = delivery_history().record(e.filename for e in st.session_state.entries)
+        st.success(f"{len(new)} filename(s) added to the delivery history "
+                   f"({len(st.session_state.entries) - len(new)} already there).")
+    # Modèle pour rename.py : colonne source à remplir avec le chemin de chaque master
+    st.download_button("Download rename mapping (CSV)", data=cached_template(digest, st.session_state.entries),
+                       file_name="rename_mapping.csv", mime="text/csv")
+rerun.lap("export")
+
+
+
+with st.expander("Storage planner"):
+    pl_source = st.radio("Plan", ["Current list", "Uploaded table"], horizontal=True, key="pl_source")
+    pl_default = st.text_input("Default duration (hh:mm:ss)", placeholder="01:30:00", key="pl_duration")
+    pl_file = st.file_uploader("Table with filename, duration (hh:mm:ss) and volume columns",
+                               type=list(IMPORT_TYPES), key="pl_upload")
+    if st.button("Compute storage plan"):
+        # NumPy n'est chargé qu'au premier calcul
+        from planner import parse_duration, plan_entries, plan_table
+        default_sec = parse_duration(pl_default) if pl_default.strip() else float("nan")
+        try:
+            rows = read_rows(pl_file.getvalue(), Path(pl_file.name).suffix.lower().lstrip(".")) if pl_file else []
+        except ValueError as exc:
+            st.error(str(exc))
+            rows = []
+        if pl_source == "Uploaded table":
+            plan, plan_errors = plan_table(rows, default_sec)
+            if plan_errors:
+                st.warning(f"{len(plan_errors)} row(s) skipped or without estimate.")
+                st.dataframe([{"row": n, "error": msg} for n, msg in plan_errors],
+                             use_container_width=True, hide_index=True)
+        else:
+            # La table éventuelle donne durée et volume par nom ; sinon la durée par défaut
+            plan = plan_entries(st.session_state.entries, rows, default_sec)
+        c1, c2, c3 = st.columns(3)
+        c1.metric("Entries", f"{len(plan):,}")
+        c2.metric("Total", f"{plan.total_gb:,.1f} GB")
+        c3.metric("Without estimate", f"{plan.unknown:,}")
+        for col, (label, table) in zip(st.columns(3), (("File format", plan.by_format()),
+                                                      ("Language", plan.by_language()),
+                                                      ("Volume", plan.by_volume()))):
+            col.dataframe([{label: k, "Entries": n, "GB": round(gb, 2)} for k, (n, gb) in table.items()],
+                          hide_index=True, use_container_width=True)
+rerun.lap("planner")
 
 with st.expander("Quick file size Calculator"):
     # Harmonise la hauteur des widgets et du bouton
@@ -476,9 +487,39 @@ with st.expander("Quick file size Calculator"):
             do_compute = st.form_submit_button("Compute")
 
         if do_compute:
+            from planner import bitrate_h264_high
             total_sec = int(dur_h)*3600 + int(dur_m)*60 + int(dur_s)
             mb, gb = bitrate_h264_high(bitrate_mbps, total_sec)
             st.info(f"Taille estimée : ~{mb:.2f} MB ({gb:.2f} GB)")
+rerun.lap("calculator")
+
+
+# Panneau d'admin (?admin=1) : histogrammes de toutes les sessions du processus
+profile_slot = None
+if st.query_params.get("admin") == "1":
+    with st.expander("Admin · performance metrics", expanded=True):
+        snapshot = metrics.snapshot()
+        if snapshot:
+            st.dataframe(snapshot, hide_index=True, use_container_width=True)
+        else:
+            st.caption("No measurements yet.")
+        if metrics_port:
+            st.caption(f"Prometheus endpoint: http://127.0.0.1:{metrics_port}/metrics")
+        a1, a2, a3 = st.columns(3)
+        a1.download_button("Download metrics (Prometheus text)", data=metrics.render_prometheus(),
+                           file_name="metrics.prom", mime="text/plain")
+        if a2.button("Profile next rerun"):
+            st.session_state[metrics.PROFILE_NEXT_KEY] = True
+            st.session_state.pop(metrics.PROFILE_REPORT_KEY, None)
+            st.rerun()
+        if a3.button("Reset metrics"):
+            metrics.reset()
+            st.rerun()
+        # Rempli en fin de script par le rapport du rerun profilé
+        profile_slot = st.empty()
+        if st.session_state.get(metrics.PROFILE_REPORT_KEY):
+            profile_slot.code(st.session_state[metrics.PROFILE_REPORT_KEY], language=None)
+rerun.lap("admin")
 
 
 
@@ -550,3 +591,7 @@ st.markdown(
     """,
     unsafe_allow_html=True,
 )
+
+profile_report = rerun.finish("footer")  # aussi gardé dans l'état de session
+if profile_report and profile_slot is not None:
+    profile_slot.code(profile_report, language=None)
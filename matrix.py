@@ -0,0 +1,127 @@
+"""Matrice de livraison : toutes les combinaisons de valeurs choisies par champ.
+
+Les combinaisons sont produites à la demande (générateur), jamais stockées ;
+le nombre total est calculé sans les générer.
+
+    python matrix.py spec.json [--count] > names.csv
+
+spec.json : {"program": "Film", "date": "2024-05-01", "language": ["FR", "EN"],
+             "subtitles": ["NOSUB", "EN"], …, "exclude": [{"subtitles": "NOSUB", "fileformat": "DCP"}]}
+"""
+import argparse, csv, itertools, json, math, sys
+from datetime import date
+
+from naming import FIELDS, build_name, parse_date
+
+
+def normalize_spec(spec):
+    """{champ: valeur ou liste} → liste de valeurs par champ, dans l'ordre de FIELDS (doublons retirés)."""
+    values = []
+    for f in FIELDS:
+        v = spec.get(f, "")
+        v = list(v) if isinstance(v, (list, tuple, set)) else [v]
+        if f == "date":
+            v = [parse_date(d) or date.today() for d in v]
+        values.append(list(dict.fromkeys(v)) or [""])
+    return values
+
+def parse_rule(text):
+    """'subtitles=NOSUB & fileformat=DCP' → {"subtitles": "NOSUB", "fileformat": "DCP"}.
+
+    Une règle déjà sous forme de dict (spec JSON) est validée de la même façon ; ses valeurs
+    passent en texte (« cadence »: 25 → "25"), comme les valeurs des combinaisons comparées.
+    """
+    if isinstance(text, dict):
+        bad = [f for f, v in text.items() if f not in FIELDS or not isinstance(v, (str, int, float))]
+        if bad or not text:
+            raise ValueError(f"invalid exclusion rule {text!r} (expected {{field: value}} with fields of {', '.join(FIELDS)})")
+        return {f: str(v).strip() for f, v in text.items()}
+    if not isinstance(text, str):
+        raise ValueError(f"invalid exclusion rule {text!r} (expected 'field=value & field=value' or an object)")
+    rule = {}
+    for part in text.split("&"):
+        field, sep, value = part.partition("=")
+        field = field.strip()
+        if not sep or field not in FIELDS:
+            raise ValueError(f"invalid exclusion rule {text!r} (expected field=value & field=value)")
+        rule[field] = value.strip()
+    return rule
+
+def _compile_rules(rules):
+    """Règles → [(indices de champs, valeurs attendues)]."""
+    return [(tuple(FIELDS.index(f) for f in r), tuple(r.values())) for r in rules if r]
+
+def _excluded(combo, compiled):
+    for idx, expected in compiled:
+        if all(str(combo[i]) == v for i, v in zip(idx, expected)):
+            return True
+    return False
+
+def count(spec, rules=()):
+    """Nombre exact de combinaisons retenues, sans générer tout le produit.
+
+    Seuls les champs cités dans les règles sont énumérés ; les autres sont multipliés.
+    """
+    values = normalize_spec(spec)
+    compiled = _compile_rules(rules)
+    ruled = sorted({i for idx, _ in compiled for i in idx})
+    free = math.prod(len(values[i]) for i in range(len(FIELDS)) if i not in ruled)
+    if not ruled:
+        return free
+    kept = 0
+    combo = [None] * len(FIELDS)
+    for sub in itertools.product(*(values[i] for i in ruled)):
+        for i, v in zip(ruled, sub):
+            combo[i] = v
+        if not _excluded(combo, compiled):
+            kept += 1
+    return free * kept
+
+def combinations(spec, rules=()):
+    """Générateur des arguments de build_name pour chaque combinaison retenue."""
+    compiled = _compile_rules(rules)
+    for combo in itertools.product(*normalize_spec(spec)):
+        if not _excluded(combo, compiled):
+            yield combo
+
+def names(spec, rules=()):
+    """Générateur de (filename, segments typés)."""
+    for combo in combinations(spec, rules):
+        yield build_name(*combo)
+
+def page(spec, rules=(), page_no=0, page_size=50):
+    """Une page de noms : seules ses combinaisons sont nommées (pas celles des pages précédentes)."""
+    start = page_no * page_size
+    return [build_name(*combo) for combo in itertools.islice(combinations(spec, rules), start, start + page_size)]
+
+def write_csv(out, spec, rules=()):
+    """Écrit filename + segments au fil de l'eau dans out (flux texte) ; renvoie le nombre de lignes."""
+    w = csv.writer(out)
+    w.writerow(["filename", "segments"])
+    n = 0
+    for fname, typed in names(spec, rules):
+        w.writerow([fname, " ".join(f"{t}={v}" for t, v in typed)])
+        n += 1
+    return n
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="Clean Masters Filename Generator — delivery matrix")
+    ap.add_argument("spec", help="fichier JSON : valeurs par champ + règles 'exclude'")
+    ap.add_argument("--count", action="store_true", help="affiche seulement le nombre de combinaisons")
+    args = ap.parse_args(argv)
+    with open(args.spec, encoding="utf-8") as f:
+        spec = json.load(f)
+    try:
+        rules = [parse_rule(r) for r in spec.pop("exclude", [])]
+    except ValueError as exc:
+        ap.error(str(exc))
+    if args.count:
+        print(count(spec, rules))
+    else:
+        write_csv(sys.stdout, spec, rules)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,235 @@
+"""Mesures de temps : histogrammes par phase de rerun de l'app et par fonction instrumentée.
+
+Les histogrammes (seaux fixes, comme Prometheus) sont partagés par toutes les sessions
+du processus. Ils sont lisibles dans le panneau d'admin de l'app (?admin=1), au format
+texte Prometheus (render_prometheus : servi par serve() si [metrics] port est réglé
+dans config.ini, et par GET /metrics de api.py), et un rerun peut être profilé en entier
+avec cProfile.
+
+    rerun = Rerun()
+    …
+    rerun.lap("form")            # temps écoulé depuis le lap précédent
+    …
+    rerun.finish()               # + durée totale du rerun
+
+    @timed("build_filename")     # chaque appel
+    with timer("pdf_bytes"): …
+"""
+import cProfile, io, pstats, threading
+from bisect import bisect_left
+from contextlib import contextmanager
+from functools import wraps
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from time import perf_counter
+
+from naming import CONFIG_PATH, read_config
+
+# Bornes supérieures des seaux (secondes) ; un dernier seau +Inf s'y ajoute
+BUCKETS = (0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05,
+           0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+PHASE_METRIC = "cmf_rerun_phase_seconds"
+CALL_METRIC = "cmf_call_seconds"
+_HELP = {
+    PHASE_METRIC: ("phase", "Duration of each phase of a Streamlit rerun (phase=\"total\": whole rerun)."),
+    CALL_METRIC: ("function", "Duration of each call to an instrumented function."),
+}
+# Lignes du rapport cProfile (tri par temps cumulé)
+PROFILE_LINES = 40
+# Clés de l'état de session utilisées par Rerun
+PROFILE_NEXT_KEY = "profile_next_rerun"
+PROFILER_KEY = "_rerun_profiler"
+PROFILE_REPORT_KEY = "profile_report"
+
+
+class Histogram:
+    __slots__ = ("counts", "count", "sum", "lock")
+
+    def __init__(self):
+        self.counts = [0] * (len(BUCKETS) + 1)
+        self.count = 0
+        self.sum = 0.0
+        self.lock = threading.Lock()
+
+    def observe(self, seconds):
+        i = bisect_left(BUCKETS, seconds)
+        with self.lock:
+            self.counts[i] += 1
+            self.count += 1
+            self.sum += seconds
+
+    def quantile(self, q):
+        """Estimation par interpolation linéaire dans le seau (comme histogram_quantile)."""
+        with self.lock:
+            counts, total = list(self.counts), self.count
+        if not total:
+            return float("nan")
+        rank, seen = q * total, 0
+        for i, n in enumerate(counts):
+            if n and seen + n >= rank:
+                if i == len(BUCKETS):
+                    return BUCKETS[-1]  # seau +Inf : borne connue la plus haute
+                lo = BUCKETS[i - 1] if i else 0.0
+                return lo + (BUCKETS[i] - lo) * (rank - seen) / n
+            seen += n
+        return BUCKETS[-1]
+
+
+_histograms = {}  # (métrique, valeur du label) -> Histogram
+_registry_lock = threading.Lock()
+
+def histogram(metric, label_value):
+    h = _histograms.get((metric, label_value))
+    if h is None:
+        with _registry_lock:
+            h = _histograms.setdefault((metric, label_value), Histogram())
+    return h
+
+def observe(metric, label_value, seconds):
+    histogram(metric, label_value).observe(seconds)
+
+def reset():
+    with _registry_lock:
+        _histograms.clear()
+
+
+def timed(function, metric=CALL_METRIC):
+    """Décorateur : chaque appel est mesuré dans l'histogramme function de metric."""
+    def decorate(fn):
+        h = histogram(metric, function)
+
+        @wraps(fn)
+        def wrapper(*args, **kwargs):
+            t0 = perf_counter()
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                h.observe(perf_counter() - t0)
+        return wrapper
+    return decorate
+
+@contextmanager
+def timer(function, metric=CALL_METRIC):
+    t0 = perf_counter()
+    try:
+        yield
+    finally:
+        observe(metric, function, perf_counter() - t0)
+
+
+def _profile_report(profiler):
+    out = io.StringIO()
+    pstats.Stats(profiler, stream=out).sort_stats("cumulative").print_stats(PROFILE_LINES)
+    return out.getvalue()
+
+
+class Rerun:
+    """Chronomètre d'un rerun de l'app.
+
+    state : état de la session (st.session_state). Si state[PROFILE_NEXT_KEY] est vrai, le rerun
+    est aussi enregistré avec cProfile ; le profileur est gardé dans state pour qu'un rerun
+    interrompu avant finish() (st.rerun, exception) ne le laisse pas actif : il est arrêté au
+    rerun suivant, et son rapport gardé dans state[PROFILE_REPORT_KEY].
+    """
+
+    def __init__(self, state=None):
+        self.start = self.last = perf_counter()
+        self.profiler = None
+        self.state = state if state is not None else {}
+        leftover = self.state.pop(PROFILER_KEY, None)
+        if leftover is not None:
+            leftover.disable()
+            self.state[PROFILE_REPORT_KEY] = _profile_report(leftover)
+        if self.state.pop(PROFILE_NEXT_KEY, False):
+            self.profiler = self.state[PROFILER_KEY] = cProfile.Profile()
+            self.profiler.enable()
+
+    def lap(self, phase):
+        """Attribue à phase le temps écoulé depuis le lap précédent (ou le début du rerun)."""
+        now = perf_counter()
+        observe(PHASE_METRIC, phase, now - self.last)
+        self.last = now
+
+    def finish(self, phase=None):
+        """Dernier lap éventuel et durée totale ; renvoie le rapport cProfile (texte) si profilé.
+
+        Le rapport est aussi gardé dans state[PROFILE_REPORT_KEY]. Un rerun interrompu
+        (st.rerun, exception) ne passe pas ici : ses laps déjà faits comptent.
+        """
+        if phase:
+            self.lap(phase)
+        observe(PHASE_METRIC, "total", perf_counter() - self.start)
+        if self.profiler is None:
+            return None
+        self.profiler.disable()
+        self.state.pop(PROFILER_KEY, None)
+        report = self.state[PROFILE_REPORT_KEY] = _profile_report(self.profiler)
+        self.profiler = None
+        return report
+
+
+def snapshot():
+    """Une ligne par histogramme (pour un tableau) : nom (phase ou fonction), nombre, moyenne et quantiles en ms."""
+    rows = []
+    for (metric, value), h in sorted(_histograms.items()):
+        if not h.count:
+            continue
+        rows.append({
+            "metric": metric, "name": value, "count": h.count,
+            "mean_ms": round(h.sum / h.count * 1000, 3), "p50_ms": round(h.quantile(0.5) * 1000, 3),
+            "p95_ms": round(h.quantile(0.95) * 1000, 3), "p99_ms": round(h.quantile(0.99) * 1000, 3),
+            "total_s": round(h.sum, 3),
+        })
+    return rows
+
+def _label(name, value):
+    value = str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+    return f'{name}="{value}"'
+
+def render_prometheus():
+    """Format d'exposition texte de Prometheus (version 0.0.4)."""
+    by_metric = {}
+    for (metric, value), h in sorted(_histograms.items()):
+        by_metric.setdefault(metric, []).append((value, h))
+    lines = []
+    for metric, items in by_metric.items():
+        label_name, help_text = _HELP.get(metric, ("name", metric))
+        lines += [f"# HELP {metric} {help_text}", f"# TYPE {metric} histogram"]
+        for value, h in items:
+            with h.lock:
+                counts, count, total = list(h.counts), h.count, h.sum
+            label = _label(label_name, value)
+            cumulative = 0
+            for bound, n in zip(BUCKETS + (float("inf"),), counts):
+                cumulative += n
+                le = "+Inf" if bound == float("inf") else repr(bound)
+                lines.append(f'{metric}_bucket{{{label},le="{le}"}} {cumulative}')
+            lines.append(f"{metric}_sum{{{label}}} {total!r}")
+            lines.append(f"{metric}_count{{{label}}} {count}")
+    return "\n".join(lines) + "\n"
+
+
+class _MetricsHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        if self.path.split("?", 1)[0] != "/metrics":
+            self.send_error(404)
+            return
+        body = render_prometheus().encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):  # pas de journal par requête
+        pass
+
+def configured_port(cfg_path=CONFIG_PATH):
+    """Port de [metrics] dans config.ini ; 0 = pas de serveur."""
+    return read_config(cfg_path).getint("metrics", "port", fallback=0)
+
+def serve(port, host="127.0.0.1"):
+    """Sert GET /metrics dans un thread (démon) ; renvoie le serveur."""
+    server = ThreadingHTTPServer((host, port), _MetricsHandler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, name="metrics-http", daemon=True).start()
+    return server
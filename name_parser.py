@@ -0,0 +1,154 @@
+"""Lecture inverse d'un nom : nom de fichier → segments typés (PROGRAM, LANG_SUB, …, DATE).
+
+Le motif est compilé depuis la même section [nomenclature] que le builder. Les
+segments à vocabulaire connu (langues, formats de config.ini, cadences, audio)
+servent d'ancres ; les valeurs libres assainies peuvent contenir des « _ ».
+
+PROGRAM et VERSION sont indiscernables dans le nom (« My_Film_V2 ») : sans liste
+de programmes connus, tout va dans PROGRAM. De même « HD_24_51 » peut se lire
+ratio 24 ou cadence 24 : une valeur connue d'un segment à vocabulaire est préférée.
+"""
+import re
+from datetime import datetime
+
+from naming import (
+    LANGUAGES, SUBTITLES, CADENCES, AUDIO_FORMATS, REQUIRED_FIELDS,
+    get_nomenclature, load_config, read_config, sanitize,
+)
+
+_FREE = r"[A-Za-z0-9]+(?:_[A-Za-z0-9]+)*"
+# Après le premier segment, les valeurs libres sont paresseuses : elles n'avalent pas les segments suivants
+_FREE_LAZY = r"[A-Za-z0-9]+(?:_[A-Za-z0-9]+)*?"
+_TOKEN = r"[^_.]+"
+# Extension(s) éventuelle(s) du fichier (.mov, .000123.dpx…)
+_EXT = r"(?P<EXT>(?:\.[A-Za-z0-9]+)*)"
+
+
+def _alternation(values):
+    # Plus longues d'abord pour que « ProRes_4444 » ne s'arrête pas à « ProRes »
+    values = sorted({v for v in values if v}, key=len, reverse=True)
+    return "(?:" + "|".join(re.escape(v) for v in values) + ")"
+
+
+class NameParser:
+    def __init__(self, nomenclature=None, file_formats=None, video_formats=None, programs=()):
+        nomenclature = nomenclature or get_nomenclature()
+        if file_formats is None or video_formats is None:
+            file_formats, video_formats = load_config()
+        self.separator = nomenclature.separator
+        self.vocab = {
+            "language": {c for c, _ in LANGUAGES},
+            "subtitles": {c for c, _ in SUBTITLES},
+            "fileformat": set(file_formats),
+            "videoformat": set(video_formats),
+            "cadence": {c for c in CADENCES if c},
+            "audioformat": {c for c, _ in AUDIO_FORMATS},
+        }
+        # Programmes connus (assainis), pour séparer PROGRAM et VERSION
+        self.programs = sorted({sanitize(p) for p in programs if p}, key=len, reverse=True)
+        self.segment_types = nomenclature.segment_types
+        self._rules = nomenclature.rules
+        self._strict = re.compile(self._pattern(strict=True))
+        self._lenient = re.compile(self._pattern(strict=False))
+
+    def _segment_pattern(self, i, fields, transform, strict):
+        if transform == "lang_sub":
+            lang, sub = fields
+            langs = _alternation(self.vocab[lang]) if strict and lang in self.vocab else _TOKEN
+            subs = _alternation(self.vocab[sub] - {"NOSUB"}) if strict and sub in self.vocab else _TOKEN
+            return rf"{langs}(?:-(?:NOSUB|ST{subs}))?"
+        if transform == "yymmdd":
+            return r"\d{6}"
+        if transform == "strip_punct":
+            # Ratio d'image sans ponctuation : 185, 239…
+            return r"\d+"
+        if transform == "sanitize":
+            return _FREE if i == 0 else _FREE_LAZY
+        field = fields[0]
+        if field in self.vocab:
+            # Hors liste : un seul mot, pour pouvoir signaler la valeur inconnue
+            return _alternation(self.vocab[field]) if strict else r"[A-Za-z0-9.\-]+"
+        return _TOKEN
+
+    def _is_optional(self, fields):
+        return not any(f in REQUIRED_FIELDS for f in fields)
+
+    def _is_vocab(self, fields, transform):
+        return not transform and fields[0] in self.vocab
+
+    def _pattern(self, strict):
+        sep = re.escape(self.separator)
+        parts = []
+        for i, (seg_type, fields, transform) in enumerate(self._rules):
+            body = self._segment_pattern(i, fields, transform, strict)
+            optional = self._is_optional(fields)
+            if optional and not self._is_vocab(fields, transform):
+                # Un segment libre facultatif ne prend pas une valeur d'un segment à vocabulaire facultatif qui suit
+                later = set()
+                for _, f2, t2 in self._rules[i + 1:]:
+                    if self._is_optional(f2) and self._is_vocab(f2, t2):
+                        later |= self.vocab[f2[0]]
+                if later:
+                    body = rf"(?!{_alternation(later)}(?:{sep}|\.|$)){body}"
+            body = f"(?P<{seg_type}>{body})"
+            lead = "" if i == 0 else sep
+            parts.append(f"(?:{lead}{body})?" if optional else f"{lead}{body}")
+        return "^" + "".join(parts) + _EXT + "$"
+
+    def parse(self, name):
+        """→ (segments [(TYPE, valeur), …], None) ou (None, message d'erreur)."""
+        m = self._strict.match(name)
+        if m is None:
+            return None, self._diagnose(name)
+        typed = [(t, m.group(t)) for t in self.segment_types if m.group(t)]
+        date_code = m.groupdict().get("DATE")
+        if date_code:
+            try:
+                datetime.strptime(date_code, "%y%m%d")
+            except ValueError:
+                return None, f"invalid date {date_code!r}"
+        return self._split_program(typed), None
+
+    def _split_program(self, typed):
+        if not self.programs or "VERSION" not in self.segment_types or typed[0][0] != "PROGRAM":
+            return typed
+        head = typed[0][1]
+        for prog in self.programs:
+            if head.startswith(prog + self.separator):
+                return [("PROGRAM", prog), ("VERSION", head[len(prog) + len(self.separator):])] + typed[1:]
+        return typed
+
+    def _diagnose(self, name):
+        m = self._lenient.match(name)
+        if m is None:
+            return "does not follow the nomenclature"
+        unknown = []
+        for seg_type, fields, transform in self._rules:
+            val = m.group(seg_type)
+            if not val:
+                continue
+            if transform == "lang_sub":
+                lang, _, sub = val.partition("-")
+                if lang not in self.vocab.get(fields[0], {lang}):
+                    unknown.append(f"{fields[0]} {lang!r}")
+                if sub and sub != "NOSUB" and sub[2:] not in self.vocab.get(fields[1], {sub[2:]}):
+                    unknown.append(f"{fields[1]} {sub!r}")
+            elif not transform and fields[0] in self.vocab and val not in self.vocab[fields[0]]:
+                unknown.append(f"{fields[0]} {val!r}")
+        if unknown:
+            return "value(s) outside the allowed lists: " + ", ".join(unknown)
+        return "does not follow the nomenclature"
+
+
+_parser = (None, None)  # (ConfigParser d'origine, NameParser)
+
+def get_parser():
+    """Parseur pour la nomenclature et les listes de config.ini, recompilé quand le fichier change."""
+    global _parser
+    cp = read_config()
+    if _parser[0] is not cp:
+        _parser = (cp, NameParser())
+    return _parser[1]
+
+def parse_filename(name):
+    return get_parser().parse(name)
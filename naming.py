@@ -0,0 +1,268 @@
+"""Moteur de nomenclature, sans dépendance à Streamlit.
+
+Importable depuis des scripts (batch, CLI) comme depuis l'app `main-st.py`.
+"""
+import configparser, os, re, threading, time
+from datetime import datetime, date
+from functools import lru_cache
+from pathlib import Path
+
+
+BASE_DIR = Path(__file__).resolve().parent
+CONFIG_PATH = BASE_DIR / "config.ini"
+
+LANGUAGES = [
+    ("FR","Français"), ("ES","Espagnol"), ("EN","Anglais"), ("HI","Hindi"),
+    ("AR","Arabe"), ("BN","Bengali"), ("PT","Portugais"), ("RU","Russe"),
+    ("JA","Japonais"), ("PA","Pendjabi"), ("MR","Marathi"), ("TE","Télougou"),
+    ("VI","Vietnamien"), ("KO","Coréen"), ("ZH","Mandarin"), ("DE","Allemand"),
+    ("TA","Tamoul"), ("UR","Ourdou"), ("JV","Javanais"), ("IT","Italien")
+]
+SUBTITLES = LANGUAGES + [("NOSUB", "NoSub")]
+CADENCES = ["", "23.976", "24", "25", "29.97", "30", "50", "59.94"]
+AUDIO_FORMATS = [("20", "Stereo"), ("51", "Surround"), ("71", "7.1 Surround"), ("10", "Mono"), ("NOAUDIO", "No Audio Track")]
+
+# Champs d'une entrée, dans l'ordre des arguments de build_filename
+FIELDS = ("program", "version", "date", "language", "subtitles", "fileformat", "videoformat",
+          "videoaspect", "videores", "cadence", "audioformat", "audiocodec")
+# Mêmes champs obligatoires que le formulaire (*)
+REQUIRED_FIELDS = ("program", "date", "language", "subtitles", "fileformat", "videoformat", "audioformat")
+_DATE_IDX = FIELDS.index("date")
+
+# Tailles des caches LRU (valeurs assainies, noms complets) — les mêmes valeurs
+# (programme, version, codec…) reviennent sur des milliers de lignes d'une livraison.
+SANITIZE_CACHE_SIZE = 8192
+NAME_CACHE_SIZE = 16384
+# Délai minimal (s) entre deux vérifications du mtime de config.ini
+CONFIG_CHECK_INTERVAL = 1.0
+
+_configs = {}  # chemin -> [mtime_ns, ConfigParser, dernière vérification]
+_configs_lock = threading.Lock()
+
+
+def read_config(cfg_path=CONFIG_PATH):
+    """ConfigParser de cfg_path, partagé par tout le processus (ne pas le modifier).
+
+    Le fichier n'est relu que si son mtime a changé, vérifié au plus une fois par
+    CONFIG_CHECK_INTERVAL : une modification de config.ini s'applique sans redémarrage.
+    """
+    key = str(cfg_path)
+    now = time.monotonic()
+    cached = _configs.get(key)
+    if cached and now - cached[2] < CONFIG_CHECK_INTERVAL:
+        return cached[1]
+    with _configs_lock:
+        try:
+            mtime = os.stat(cfg_path).st_mtime_ns
+        except OSError:
+            mtime = None
+        if cached and cached[0] == mtime:
+            cached[2] = now
+            return cached[1]
+        cp = configparser.ConfigParser()
+        cp.read(cfg_path, encoding="utf-8")
+        _configs[key] = [mtime, cp, now]
+        return cp
+
+
+def load_config(cfg_path=CONFIG_PATH):
+    if not os.path.exists(cfg_path):
+        cp = configparser.ConfigParser()
+        cp["formats"] = {
+            "file_formats": "MOV, MXF, MP4, AVI, ProRes, DNxHD",
+            "video_formats": "SD, HD, 4K",
+        }
+        with open(cfg_path, "w", encoding="utf-8") as f:
+            cp.write(f)
+
+    cp = read_config(cfg_path)
+    file_formats = [s.strip() for s in cp.get("formats", "file_formats").split(",") if s.strip()]
+    video_formats = [s.strip() for s in cp.get("formats", "video_formats").split(",") if s.strip()]
+    return file_formats, video_formats
+
+_SANITIZE_DROP = re.compile(r"[^A-Za-z0-9\s]+")
+_SANITIZE_UNDERSCORES = re.compile(r"_+")
+_ASPECT_PUNCT = str.maketrans("", "", ".,")
+
+@lru_cache(maxsize=SANITIZE_CACHE_SIZE)
+def sanitize(text: str) -> str:
+    if not text: return ""
+    tmp = _SANITIZE_DROP.sub("", text)
+    return _SANITIZE_UNDERSCORES.sub("_", tmp.strip().replace(" ", "_"))
+
+def strip_punct(text: str) -> str:
+    """Ratio d'image : 1.85 / 1,85 → 185."""
+    return (text or "").translate(_ASPECT_PUNCT)
+
+def lang_sub(language, subtitles) -> str:
+    if subtitles == "NOSUB":
+        return f"{language}-NOSUB"
+    if subtitles:
+        return f"{language}-ST{subtitles}"
+    return language or ""
+
+def parse_date(value):
+    """date, datetime ou texte ISO (AAAA-MM-JJ) → date ; None si vide. ValueError si invalide."""
+    if isinstance(value, datetime):
+        return value.date()
+    if isinstance(value, date):
+        return value
+    value = str(value or "").strip()
+    return date.fromisoformat(value[:10]) if value else None
+
+def yymmdd(dt) -> str:
+    if not isinstance(dt, date):
+        dt = datetime.now()
+    return f"{dt.year % 100:02d}{dt.month:02d}{dt.day:02d}"
+
+# Transformations utilisables dans la section [nomenclature] de config.ini
+TRANSFORMS = {
+    "sanitize": sanitize,
+    "strip_punct": strip_punct,
+    "lang_sub": lang_sub,
+    "yymmdd": yymmdd,
+}
+
+# Utilisée si config.ini n'a pas de section [nomenclature]
+DEFAULT_NOMENCLATURE = """
+[nomenclature]
+separator = _
+segments = PROGRAM, VERSION, LANG_SUB, FILE_FORMAT, VIDEO_FORMAT, VIDEO_ASPECT, RESOLUTION, CADENCE, AUDIO_FORMAT, AUDIO_CODEC, DATE
+PROGRAM = program | sanitize
+VERSION = version | sanitize
+LANG_SUB = language, subtitles | lang_sub
+FILE_FORMAT = fileformat
+VIDEO_FORMAT = videoformat
+VIDEO_ASPECT = videoaspect | strip_punct
+RESOLUTION = videores | sanitize
+CADENCE = cadence
+AUDIO_FORMAT = audioformat
+AUDIO_CODEC = audiocodec | sanitize
+DATE = date | yymmdd
+"""
+
+
+def _parse_rule(seg_type, rule):
+    """'language, subtitles | lang_sub' → (("language", "subtitles"), "lang_sub")."""
+    fields_part, _, transform_name = rule.partition("|")
+    fields = tuple(f.strip() for f in fields_part.split(",") if f.strip())
+    unknown = [f for f in fields if f not in FIELDS]
+    if not fields or unknown:
+        raise ValueError(f"[nomenclature] {seg_type}: unknown field(s) {unknown or fields_part!r}")
+    transform_name = transform_name.strip()
+    if not transform_name and len(fields) != 1:
+        raise ValueError(f"[nomenclature] {seg_type}: several fields need a transform")
+    if transform_name and transform_name not in TRANSFORMS:
+        raise ValueError(f"[nomenclature] {seg_type}: unknown transform {transform_name!r}")
+    return fields, transform_name
+
+def _compile_rule(fields, transform_name):
+    """Règle analysée → fonction args -> valeur du segment."""
+    idx = [FIELDS.index(f) for f in fields]
+    if not transform_name:
+        i = idx[0]
+        return lambda args: args[i] or ""
+    fn = TRANSFORMS[transform_name]
+    if len(idx) == 1:
+        i = idx[0]
+        return lambda args: fn(args[i])
+    return lambda args: fn(*[args[i] for i in idx])
+
+
+class Nomenclature:
+    """Règles de nommage compilées une fois, appliquées en une seule passe."""
+
+    def __init__(self, segments, separator="_", cache_size=NAME_CACHE_SIZE):
+        # segments : liste (TYPE, règle texte)
+        self.separator = separator
+        self.segment_types = tuple(t for t, _ in segments)
+        # (TYPE, champs, transformation) — relu par name_parser pour le sens inverse
+        self.rules = tuple((t, *_parse_rule(t, rule)) for t, rule in segments)
+        self._plan = tuple((t, _compile_rule(fields, tr)) for t, fields, tr in self.rules)
+        self._cached_build = lru_cache(maxsize=cache_size)(self._build)
+
+    @classmethod
+    def from_config(cls, cp):
+        if not cp.has_section("nomenclature"):
+            cp = configparser.ConfigParser()
+            cp.read_string(DEFAULT_NOMENCLATURE)
+        sec = cp["nomenclature"]
+        order = [s.strip().upper() for s in sec.get("segments", "").split(",") if s.strip()]
+        missing = [t for t in order if t.lower() not in sec]
+        if missing:
+            raise ValueError(f"[nomenclature] no rule for segment(s): {', '.join(missing)}")
+        return cls([(t, sec[t.lower()]) for t in order], sec.get("separator", "_").strip() or "_")
+
+    def _build(self, args):
+        typed = []
+        for seg_type, fn in self._plan:
+            val = fn(args)
+            if val:
+                typed.append((seg_type, val))
+        return self.separator.join([v for _, v in typed]), tuple(typed)
+
+    def build(self, *args):
+        """Mêmes arguments que build_filename → (filename, segments typés).
+
+        Les segments sont un tuple de tuples : le résultat peut venir du cache, il ne doit pas être modifié.
+        """
+        # Sans date explicite le nom dépend du jour : pas de mise en cache
+        if not isinstance(args[_DATE_IDX], date):
+            return self._build(args)
+        try:
+            return self._cached_build(args)
+        except TypeError:  # argument non hashable
+            return self._build(args)
+
+    def cache_info(self):
+        return self._cached_build.cache_info()
+
+    def cache_clear(self):
+        self._cached_build.cache_clear()
+
+
+def load_nomenclature(cfg_path=CONFIG_PATH):
+    return Nomenclature.from_config(read_config(cfg_path))
+
+_nomenclature = (None, None, float("-inf"))  # (ConfigParser d'origine, Nomenclature, dernière vérification)
+
+def get_nomenclature():
+    """Nomenclature par défaut (config.ini), recompilée seulement quand le fichier change.
+
+    Appelée pour chaque nom : hors vérification périodique, un seul appel à time.monotonic().
+    """
+    global _nomenclature
+    cp, nomenclature, checked = _nomenclature
+    now = time.monotonic()
+    if now - checked < CONFIG_CHECK_INTERVAL:
+        return nomenclature
+    current = read_config()
+    if current is not cp:
+        nomenclature = Nomenclature.from_config(current)
+    _nomenclature = (current, nomenclature, now)
+    return nomenclature
+
+def build_name(program, version, dt, language, subtitles, fileformat, videoformat,
+               videoaspect, videores, cadence, audioformat, audiocodec):
+    """Nom plat + segments typés en une seule passe."""
+    return get_nomenclature().build(program, version, dt, language, subtitles, fileformat,
+                                    videoformat, videoaspect, videores, cadence, audioformat, audiocodec)
+
+def cache_stats():
+    """Compteurs hits/misses des caches de nommage (dict nom -> CacheInfo)."""
+    return {"sanitize": sanitize.cache_info(), "names": get_nomenclature().cache_info()}
+
+def cache_clear():
+    sanitize.cache_clear()
+    get_nomenclature().cache_clear()
+
+def build_filename(program, version, dt, language, subtitles, fileformat, videoformat,
+                   videoaspect_raw, videores, cadence, audioformat, audiocodec):
+    return build_name(program, version, dt, language, subtitles, fileformat, videoformat,
+                      videoaspect_raw, videores, cadence, audioformat, audiocodec)[0]
+
+def build_typed_segments(program, version, form_date, language, subtitles,
+                         fileformat, videoformat, videoaspect, videores,
+                         cadence, audioformat, audiocodec):
+    return list(build_name(program, version, form_date, language, subtitles, fileformat, videoformat,
+                           videoaspect, videores, cadence, audioformat, audiocodec)[1])
@@ -0,0 +1,228 @@
+"""Rendu PDF de l'export list (ReportLab).
+
+La mise en page (hauteur de carte, sauts de page) est calculée à part du dessin ;
+le fond de carte (ombre, fond, bordure, icône) n'est dessiné qu'une fois par hauteur
+de carte, sous forme de XObject réutilisé par chaque entrée.
+
+Pour les très grandes listes, les pages sont réparties entre plusieurs processus
+puis fusionnées (pypdf requis, sinon rendu séquentiel).
+"""
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+from io import BytesIO
+from tempfile import SpooledTemporaryFile
+
+from reportlab.pdfgen import canvas
+from reportlab.lib.pagesizes import A4
+from reportlab.lib.utils import ImageReader
+
+try:
+    from pypdf import PdfReader, PdfWriter
+except ImportError:  # rendu parallèle indisponible
+    PdfReader = PdfWriter = None
+
+from assets import ICON_PATH, LOGO_PATH, png_bytes
+from naming import sanitize
+
+
+# Géométrie des cartes (points)
+MARGIN_X = 40
+TOP = 80
+HEADER_GAP = 40
+BOTTOM_LIMIT = 60
+PAD = 12
+VPAD_BOTTOM = 10
+CORNER = 10
+SHADOW_OFFSET = 2
+ICON_W, ICON_H = 26, 26
+MIN_CARD_H = 48
+# Logo dessiné en 50 pt : 256 px suffisent (≈ 370 dpi) au lieu de l'image source complète
+LOGO_SIZE = 50
+LOGO_MAX_PX = 256
+# Ligne de checksum sous le dernier texte de la carte
+CHECKSUM_GAP = 14
+
+# Au-delà, le PDF est écrit sur disque plutôt qu'en mémoire
+SPOOL_MAX_SIZE = 8 * 1024 * 1024
+# En dessous, le coût de démarrage des processus dépasse le gain
+PARALLEL_MIN_ENTRIES = 5000
+
+
+def card_height(e):
+    """Hauteur d'une carte : ne dépend que de la présence d'une description, d'un checksum et d'un ID."""
+    has_desc = bool((e.get("description") or "").strip())
+    has_sum = bool((e.get("checksum") or "").strip())
+    has_id = bool((e.get("id") or "").strip())
+    # Positions relatives au haut de la carte (voir _draw_card)
+    desc_off = PAD + 24 if has_desc else PAD + 6
+    text_off = desc_off + CHECKSUM_GAP if has_sum else desc_off
+    icon_off = PAD + ICON_H
+    id_off = icon_off + 10 if has_id else icon_off
+    card_h = max(text_off, id_off) + VPAD_BOTTOM
+    return max(card_h, MIN_CARD_H)
+
+def layout(entries, page_h=A4[1]):
+    """Passe de mise en page : liste des pages, chacune liste de (index, y haut de carte, hauteur).
+
+    Déterministe : ne dépend que des hauteurs de cartes, donc réutilisable pour un rendu par morceaux.
+    """
+    first_y = page_h - TOP - HEADER_GAP
+    pages, current, y = [], [], first_y
+    for i, e in enumerate(entries):
+        card_h = card_height(e)
+        if y - card_h < BOTTOM_LIMIT and current:
+            pages.append(current)
+            current, y = [], first_y
+        current.append((i, y, card_h))
+        y -= card_h + PAD
+    if current or not pages:
+        pages.append(current)
+    return pages
+
+
+def _card_form(c, card_w, card_h):
+    """Déclare (une fois) le XObject du fond de carte pour une hauteur donnée."""
+    name = f"card{card_h:g}"
+    if c.hasForm(name):
+        return name
+    c.beginForm(name, lowerx=0, lowery=-SHADOW_OFFSET, upperx=card_w + SHADOW_OFFSET, uppery=card_h)
+    # --- Ombre légère (offset) ---
+    c.setFillColorRGB(0.85, 0.87, 0.92)
+    c.roundRect(SHADOW_OFFSET, -SHADOW_OFFSET, card_w, card_h, CORNER, fill=True, stroke=False)
+    # --- Carte blanche moderne + bordure subtile ---
+    c.setFillColorRGB(1, 1, 1)
+    c.roundRect(0, 0, card_w, card_h, CORNER, fill=True, stroke=False)
+    c.setStrokeColorRGB(0.88, 0.88, 0.92)
+    c.roundRect(0, 0, card_w, card_h, CORNER, fill=False, stroke=True)
+    # --- Icône fichier (image png) ---
+    icon_x, icon_y = PAD, card_h - PAD - ICON_H
+    if os.path.exists(ICON_PATH):
+        c.drawImage(ICON_PATH, icon_x, icon_y, width=ICON_W, height=ICON_H, mask='auto', preserveAspectRatio=True)
+    else:
+        # Fallback simple si l’icône manque
+        c.setFillColorRGB(1.0, 0.84, 0.0)
+        c.rect(icon_x, icon_y, ICON_W, ICON_H, fill=True, stroke=False)
+    c.endForm()
+    return name
+
+def _draw_header(c, title, first_page):
+    y = c._pagesize[1] - TOP
+    logo = png_bytes(LOGO_PATH, LOGO_MAX_PX) if first_page else None
+    if logo:
+        c.drawImage(ImageReader(BytesIO(logo)), MARGIN_X, y - 20, width=LOGO_SIZE, height=LOGO_SIZE,
+                    mask='auto', preserveAspectRatio=True)
+    c.setFillColorRGB(0, 0, 0)
+    c.setFont("Helvetica-Bold", 16)
+    c.drawString(100 if first_page else MARGIN_X, y, title)
+
+def _draw_card(c, e, y, card_h):
+    card_w = c._pagesize[0] - 2 * MARGIN_X
+    form = _card_form(c, card_w, card_h)
+    c.saveState()
+    c.translate(MARGIN_X, y - card_h)
+    c.doForm(form)
+    c.restoreState()
+
+    icon_x = MARGIN_X + PAD
+    icon_y = y - PAD - ICON_H
+    # --- ID sous l’icône, centré (sans libellé) ---
+    id_text = str(e.get("id") or "").strip()
+    if id_text:
+        c.setFont("Helvetica", 9)
+        c.setFillColorRGB(0.35, 0.40, 0.55)
+        c.drawCentredString(icon_x + ICON_W / 2.0, icon_y - 10, id_text)
+
+    # --- Texte à droite de l’icône ---
+    tx = icon_x + ICON_W + PAD
+    c.setFillColorRGB(0, 0, 0)
+    c.setFont("Helvetica-Bold", 12)
+    c.drawString(tx, y - PAD - 6, (e.get("filename", ""))[:80])
+    desc = e.get("description") or ""
+    if desc.strip():
+        c.setFont("Helvetica-Oblique", 10)
+        c.setFillColorRGB(0.2, 0.2, 0.2)
+        c.drawString(tx, y - PAD - 24, desc[:90])
+    checksum = e.get("checksum") or ""
+    if checksum.strip():
+        off = (PAD + 24 if desc.strip() else PAD + 6) + CHECKSUM_GAP
+        c.setFont("Courier", 7)
+        c.setFillColorRGB(0.35, 0.40, 0.55)
+        c.drawString(tx, y - off, checksum[:110])
+
+def export_title(program, today):
+    return f"EXPORT LIST {sanitize(program)} {today}"
+
+def export_filename(program, today):
+    return f"{sanitize(program)}_{today}_export_list.pdf"
+
+def render_pages(c, entries, pages, title, first_page_no=0):
+    """Dessine les pages données (issues de layout) sur le canvas c."""
+    for n, page in enumerate(pages, start=first_page_no):
+        _draw_header(c, title, first_page=(n == 0))
+        for i, y, card_h in page:
+            _draw_card(c, entries[i], y, card_h)
+        c.showPage()
+
+def _render_shard(job):
+    """Rend une tranche de pages dans un PDF autonome (exécuté dans un processus du pool)."""
+    entries, pages, title, first_page_no = job
+    buf = BytesIO()
+    c = canvas.Canvas(buf, pagesize=A4)
+    render_pages(c, entries, pages, title, first_page_no)
+    c.save()
+    return buf.getvalue()
+
+def _shard_jobs(entries, pages, title, shards):
+    """Découpe les pages en tranches contiguës ; chaque tranche n'emporte que ses entrées."""
+    per_shard = -(-len(pages) // shards)
+    for start in range(0, len(pages), per_shard):
+        chunk = pages[start:start + per_shard]
+        lo, hi = chunk[0][0][0], chunk[-1][-1][0] + 1
+        sub = [{k: entries[i].get(k, "") for k in ("id", "filename", "description", "checksum")}
+               for i in range(lo, hi)]
+        chunk = [[(i - lo, y, card_h) for i, y, card_h in page] for page in chunk]
+        yield sub, chunk, title, start
+
+def render_pdf_parallel(entries, program, out, workers, today=None):
+    """Mise en page une seule fois, rendu des tranches de pages en parallèle, puis fusion."""
+    today = today or datetime.now().strftime("%Y%m%d")
+    title = export_title(program, today)
+    pages = layout(entries)
+    # spawn : le serveur Streamlit est multi-threadé, fork n'y est pas sûr
+    ctx = multiprocessing.get_context("spawn")
+    with ProcessPoolExecutor(max_workers=workers, mp_context=ctx) as pool:
+        parts = pool.map(_render_shard, _shard_jobs(entries, pages, title, workers))
+        writer = PdfWriter()
+        for part in parts:
+            writer.append(PdfReader(BytesIO(part)))
+    writer.write(out)
+    return export_filename(program, today)
+
+def render_pdf(entries, program, out, today=None, workers=None):
+    """Écrit le PDF dans out (fichier binaire, réponse HTTP…) ; renvoie le nom de fichier.
+
+    workers : nombre de processus ; None = automatique (parallèle pour les grandes listes).
+    """
+    if workers is None:
+        workers = (os.cpu_count() or 1) if len(entries) >= PARALLEL_MIN_ENTRIES else 1
+    if workers > 1 and PdfWriter is not None and entries:
+        return render_pdf_parallel(entries, program, out, workers, today)
+    today = today or datetime.now().strftime("%Y%m%d")
+    c = canvas.Canvas(out, pagesize=A4)
+    render_pages(c, entries, layout(entries), export_title(program, today))
+    c.save()
+    return export_filename(program, today)
+
+def pdf_file(entries, program, workers=None):
+    """PDF dans un fichier temporaire (en mémoire tant qu'il est petit), positionné au début."""
+    out = SpooledTemporaryFile(max_size=SPOOL_MAX_SIZE)
+    fname = render_pdf(entries, program, out, workers=workers)
+    out.seek(0)
+    return out, fname
+
+def pdf_bytes(entries, program, workers=None):
+    out, fname = pdf_file(entries, program, workers)
+    with out:
+        return out.read(), fname
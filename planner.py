@@ -0,0 +1,245 @@
+"""Estimation des tailles de fichiers et du stockage d'une livraison.
+
+Le débit de chaque entrée vient de son format de fichier (section [bitrates] de
+config.ini, en Mbps pour du HD à 25 i/s), mis à l'échelle de son format vidéo
+([resolution_scale]) et de sa cadence. Toutes les tailles sont calculées en une
+passe NumPy avec la formule de bitrate_h264_high, puis totalisées par format, par
+langue et par volume.
+
+    python planner.py plan.csv      # colonnes : filename (ou fileformat, videoformat, language,
+                                    # cadence), duration, volume (facultative)
+"""
+import argparse, csv, sys
+from pathlib import Path
+
+import numpy as np
+
+from importer import normalize_header, read_rows
+from naming import CONFIG_PATH, read_config
+from name_parser import get_parser
+
+# Valeurs par défaut si config.ini n'a pas les sections (Mbps, HD 1080 à 25 i/s)
+DEFAULT_BITRATES = {
+    "ProRes_422HQ": 184, "ProRes_4444": 275, "DnxHD_185X": 185, "DnxHR_444": 366,
+    "H264-LBR": 10, "H264-HBR": 40, "DCP": 250, "DPX": 1659, "WAVE": 7,
+}
+DEFAULT_SCALES = {"SD": 0.25, "HD": 1, "2KFLAT": 0.96, "2KDCI": 1.07, "UHD": 4, "4KFLAT": 3.85, "4KDCI": 4.27}
+REFERENCE_FPS = 25.0
+DEFAULT_VOLUME = "default"
+
+
+def bitrate_h264_high(mbps, total_sec):
+    """Débit (Mbps) × durée (s) → (MB, GB), +1 % de conteneur ; accepte aussi des tableaux NumPy."""
+    size_mb = (mbps * total_sec) / 8
+    size_gb = size_mb / 1024
+    return size_mb*1.01, size_gb*1.01  # +1% overhead conteneur
+
+def load_bitrates(cfg_path=CONFIG_PATH):
+    """({format de fichier: Mbps}, {format vidéo: facteur}) ; clés comparées sans la casse."""
+    cp = read_config(cfg_path)
+    bitrates = {k.lower(): float(v) for k, v in DEFAULT_BITRATES.items()}
+    scales = {k.lower(): float(v) for k, v in DEFAULT_SCALES.items()}
+    if cp.has_section("bitrates"):
+        bitrates.update({k: float(v) for k, v in cp["bitrates"].items()})
+    if cp.has_section("resolution_scale"):
+        scales.update({k: float(v) for k, v in cp["resolution_scale"].items()})
+    return bitrates, scales
+
+def parse_duration(value):
+    """'01:32:10', '92:10', '5530' ou 5530 → secondes (NaN si vide ou illisible)."""
+    if isinstance(value, (int, float)):
+        return float(value)
+    parts = str(value or "").strip().split(":")
+    try:
+        secs = 0.0
+        for p in parts:
+            secs = secs * 60 + float(p)
+        return secs
+    except ValueError:
+        return float("nan")
+
+
+def _factorize(values):
+    """Valeurs → (valeurs distinctes, code de chaque valeur) ; bien plus rapide que np.unique sur du texte."""
+    codes = {}
+    inverse = np.fromiter((codes.setdefault(v, len(codes)) for v in values), dtype=np.intp)
+    return list(codes), inverse
+
+def _lookup(values, table, default=np.nan):
+    """Valeurs texte → tableau des valeurs de table, une recherche par valeur distincte."""
+    uniq, inverse = _factorize(values)
+    mapped = np.array([table.get(str(u).lower(), default) for u in uniq], dtype=float)
+    return mapped[inverse]
+
+def frame_rate(cadence):
+    """Cadence → images/s ; vide = REFERENCE_FPS, illisible (« 25p ») = NaN (pas d'estimation)."""
+    if cadence in (None, ""):
+        return REFERENCE_FPS
+    try:
+        fps = float(cadence)
+    except (TypeError, ValueError):
+        return float("nan")
+    return fps if fps > 0 else float("nan")
+
+def _fps(cadences):
+    uniq, inverse = _factorize(cadences)
+    fps = np.array([frame_rate(u) for u in uniq], dtype=float)
+    return fps[inverse]
+
+def sizes_gb(fileformats, videoformats, cadences, seconds, bitrates=None, scales=None):
+    """Taille estimée (GB) de chaque entrée, en une passe ; NaN si format ou durée inconnus."""
+    if bitrates is None or scales is None:
+        bitrates, scales = load_bitrates()
+    mbps = _lookup(fileformats, bitrates)
+    mbps = mbps * _lookup(videoformats, scales, default=1.0) * (_fps(cadences) / REFERENCE_FPS)
+    return bitrate_h264_high(mbps, np.asarray(seconds, dtype=float))[1]
+
+def totals(keys, sizes):
+    """{clé: (nombre d'entrées, GB)} ; les tailles inconnues (NaN) sont comptées mais pas sommées."""
+    uniq, inverse = _factorize(keys)
+    counts = np.bincount(inverse, minlength=len(uniq))
+    gb = np.bincount(inverse, weights=np.nan_to_num(sizes), minlength=len(uniq))
+    return {k: (int(n), float(g)) for k, n, g in sorted(zip(uniq, counts, gb))}
+
+
+class Plan:
+    """Colonnes d'une livraison (une valeur par entrée) et tailles calculées."""
+
+    def __init__(self, fileformats, videoformats, cadences, languages, volumes, seconds):
+        self.fileformats = fileformats
+        self.videoformats = videoformats
+        self.languages = languages
+        self.volumes = volumes
+        self.seconds = np.asarray(seconds, dtype=float)
+        self.gb = sizes_gb(fileformats, videoformats, cadences, self.seconds)
+
+    def __len__(self):
+        return len(self.gb)
+
+    @property
+    def total_gb(self):
+        return float(np.nansum(self.gb))
+
+    @property
+    def unknown(self):
+        """Entrées sans estimation (format sans débit ou durée manquante)."""
+        return int(np.isnan(self.gb).sum())
+
+    def by_format(self):
+        return totals(self.fileformats, self.gb)
+
+    def by_language(self):
+        return totals(self.languages, self.gb)
+
+    def by_volume(self):
+        return totals(self.volumes, self.gb)
+
+# Segments utiles au plan
+PLAN_SEGMENTS = ("FILE_FORMAT", "VIDEO_FORMAT", "CADENCE", "LANG_SUB")
+
+def plan_columns(cols, seconds, volumes=None):
+    """Plan depuis {TYPE de PLAN_SEGMENTS: [valeur par entrée]}."""
+    languages = [v.split("-", 1)[0] for v in cols["LANG_SUB"]]
+    volumes = volumes if volumes is not None else [DEFAULT_VOLUME] * len(languages)
+    return Plan(cols["FILE_FORMAT"], cols["VIDEO_FORMAT"], cols["CADENCE"], languages, volumes, seconds)
+
+def plan_segments(segments, seconds, volumes=None):
+    """Plan depuis les segments typés des entrées ([(TYPE, valeur), …] par entrée)."""
+    cols = {t: [] for t in PLAN_SEGMENTS}
+    for typed in segments:
+        seg = dict(typed)
+        for t, col in cols.items():
+            col.append(seg.get(t, ""))
+    return plan_columns(cols, seconds, volumes)
+
+# Colonnes d'une liste de livraison (voir importer) qui évitent de relire les noms
+TABLE_FIELDS = {"fileformat": "FILE_FORMAT", "videoformat": "VIDEO_FORMAT", "cadence": "CADENCE",
+                "language": "LANG_SUB"}
+
+def _table_columns(rows, default_seconds):
+    """Lignes brutes → {colonne: [valeurs]} + secondes ; chaque durée distincte n'est lue qu'une fois."""
+    wanted = ("filename", "duration", "volume") + tuple(TABLE_FIELDS)
+    cols = {k: [] for k in wanted}
+    headers = {}  # en-têtes d'origine -> en-tête d'origine de chaque colonne voulue
+    for r in rows:
+        keys = headers.get(tuple(r))
+        if keys is None:
+            norm = {normalize_header(k): k for k in r}
+            keys = headers[tuple(r)] = [(cols[k], norm[k]) for k in wanted if k in norm]
+        for col, k in keys:
+            col.append(r[k])
+    n = len(rows)
+    cols = {k: v for k, v in cols.items() if len(v) == n and n}
+    uniq, inverse = _factorize(cols.pop("duration", [None] * n))
+    seconds = np.array([parse_duration(d) if d not in (None, "") else default_seconds for d in uniq],
+                       dtype=float)[inverse]
+    cols["filename"] = [str(v or "").strip() for v in cols.get("filename", [""] * n)]
+    cols["volume"] = [str(v or DEFAULT_VOLUME) for v in cols.get("volume", [None] * n)]
+    return cols, seconds
+
+def plan_table(rows, default_seconds=float("nan")):
+    """Plan depuis une table : filename, duration, volume, et si présents fileformat, videoformat,
+    cadence, language (sinon les noms sont relus par le parseur).
+
+    Renvoie (plan, erreurs [(numéro de ligne, message)]) ; une ligne de cadence illisible est
+    gardée sans estimation, une ligne au nom non conforme est écartée.
+    """
+    rows = list(rows)
+    cols, seconds = _table_columns(rows, default_seconds)
+    if all(f in cols for f in ("fileformat", "videoformat", "language")):
+        plan_cols = {seg: [str(v or "") for v in cols.get(f, [""] * len(rows))]
+                     for f, seg in TABLE_FIELDS.items()}
+        cadences = plan_cols["CADENCE"]
+        bad = {c for c in _factorize(cadences)[0] if np.isnan(frame_rate(c))}
+        errors = [(i + 1, f"cadence {c!r} is not a frame rate") for i, c in enumerate(cadences) if c in bad]
+        return plan_columns(plan_cols, seconds, cols["volume"]), errors
+    parser = get_parser()
+    segments, keep, errors = [], [], []
+    for i, name in enumerate(cols["filename"]):
+        typed, error = parser.parse(name)
+        if error:
+            errors.append((i + 1, error))
+            continue
+        segments.append(typed)
+        keep.append(i)
+    return plan_segments(segments, seconds[keep], [cols["volume"][i] for i in keep]), errors
+
+def plan_entries(entries, rows=(), default_seconds=float("nan")):
+    """Plan de la liste d'entrées ; durée et volume pris dans rows (par filename), sinon la durée par défaut."""
+    rows = list(rows)
+    cols, table_seconds = _table_columns(rows, default_seconds)
+    table_volumes = cols["volume"]
+    if rows:
+        row_of = {name: i for i, name in enumerate(cols["filename"])}
+        idx = np.fromiter((row_of.get(e.filename, -1) for e in entries), dtype=np.intp, count=len(entries))
+        # -1 : entrée absente de la table, durée par défaut
+        seconds = np.where(idx >= 0, table_seconds[idx], default_seconds) if len(idx) else table_seconds[:0]
+        volumes = [table_volumes[i] if i >= 0 else DEFAULT_VOLUME for i in idx.tolist()]
+    else:
+        seconds, volumes = np.full(len(entries), default_seconds), None
+    return plan_columns(entries.columns(PLAN_SEGMENTS), seconds, volumes)
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="Clean Masters Filename Generator — storage planner")
+    ap.add_argument("table", help="CSV/XLSX/JSON : filename (ou colonnes de format), duration (hh:mm:ss ou s), volume")
+    ap.add_argument("--default-duration", default="", help="durée des lignes sans durée (hh:mm:ss)")
+    args = ap.parse_args(argv)
+    kind = Path(args.table).suffix.lower().lstrip(".")
+    plan, errors = plan_table(read_rows(Path(args.table).read_bytes(), kind),
+                              parse_duration(args.default_duration))
+    for row_no, msg in errors:
+        print(f"row {row_no}: {msg}", file=sys.stderr)
+    w = csv.writer(sys.stdout)
+    w.writerow(["group", "key", "entries", "gb"])
+    for group, table in (("format", plan.by_format()), ("language", plan.by_language()),
+                         ("volume", plan.by_volume())):
+        for key, (n, gb) in table.items():
+            w.writerow([group, key, n, f"{gb:.2f}"])
+    print(f"{len(plan)} entries, {plan.total_gb:,.1f} GB total, {plan.unknown} without estimate",
+          file=sys.stderr)
+    return 1 if errors else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
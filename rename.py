@@ -0,0 +1,226 @@
+"""Renommage en masse des masters d'après les noms générés.
+
+    python rename.py mapping.csv                 # plan (dry-run) : rien n'est touché
+    python rename.py mapping.csv --apply --journal rename.journal
+    python rename.py --rollback rename.journal
+
+mapping.csv (ou .xlsx / .json / .jsonl) : colonnes « source » (chemin du fichier) et
+« filename » (nom généré, sans dossier). L'extension de la source est ajoutée au nom,
+sauf s'il se termine déjà par elle (un nom généré peut contenir un point : cadence 23.976).
+
+Le plan entier est écrit et synchronisé dans le journal avant le premier renommage ;
+chaque renommage effectué y est ensuite marqué. Le rollback relit le journal et
+remet en place tout ce qui a été déplacé, même après une interruption. Les
+renommages sont faits par un thread par volume (st_dev).
+"""
+import argparse, csv, json, os, sys, threading, time, uuid
+from collections import Counter, namedtuple
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+from importer import read_rows
+
+Rename = namedtuple("Rename", "src dst")
+
+# Marques « done » regroupées avant chaque fsync du journal
+JOURNAL_SYNC_EVERY = 1000
+
+
+def write_template(out, rows):
+    """Modèle de mapping à compléter (id, filename, source vide) depuis export_rows()."""
+    w = csv.writer(out)
+    w.writerow(["id", "filename", "source"])
+    for r in rows:
+        w.writerow([r.get("id", ""), r.get("filename", ""), ""])
+
+def read_mapping(path):
+    """Fichier de mapping → [(source, nom cible)]."""
+    kind = Path(path).suffix.lower().lstrip(".")
+    rows = read_rows(Path(path).read_bytes(), kind)
+    pairs = []
+    for r in rows:
+        r = {str(k).strip().lower(): str(v or "").strip() for k, v in r.items()}
+        src, dst = r.get("source", ""), r.get("filename") or r.get("target", "")
+        if src or dst:
+            pairs.append((src, dst))
+    return pairs
+
+
+def plan(pairs):
+    """(source, nom cible) → (renommages, problèmes).
+
+    Problèmes détectés : source absente ou répétée, nom cible vide ou avec un dossier,
+    deux cibles identiques (ou identiques à la casse près), cible déjà présente sur le
+    disque et qui ne part pas elle-même dans le plan.
+    """
+    ops, problems = [], []
+    for src, name in pairs:
+        if not name or os.sep in name or (os.altsep and os.altsep in name):
+            problems.append((src, f"invalid target name {name!r}"))
+            continue
+        src = os.path.abspath(src)
+        # Pas de splitext sur le nom : « …_23.976_20_240501 » n'a pas d'extension « .976_20_240501 »
+        ext = os.path.splitext(src)[1]
+        if ext and not name.lower().endswith(ext.lower()):
+            name += ext
+        ops.append(Rename(src, os.path.join(os.path.dirname(src), name)))
+
+    src_count = Counter(op.src for op in ops)
+    dst_count = Counter(op.dst for op in ops)
+    folded = Counter(op.dst.casefold() for op in ops)
+    sources = set(src_count)
+    kept = []
+    for op in ops:
+        if src_count[op.src] > 1:
+            problems.append((op.src, "source listed more than once"))
+        elif not os.path.isfile(op.src):
+            problems.append((op.src, "source file not found"))
+        elif dst_count[op.dst] > 1:
+            problems.append((op.src, f"target {os.path.basename(op.dst)!r} used by several sources"))
+        elif folded[op.dst.casefold()] > 1:
+            problems.append((op.src, f"target {os.path.basename(op.dst)!r} differs from another only by case"))
+        elif op.dst != op.src and op.dst not in sources and os.path.lexists(op.dst):
+            problems.append((op.src, f"target {os.path.basename(op.dst)!r} already exists"))
+        elif op.dst != op.src:
+            kept.append(op)
+    return kept, problems
+
+
+def _staged(ops):
+    """Si une cible est la source d'un autre renommage (A→B, B→C, échanges…), on passe
+    par des noms temporaires : toutes les sources d'abord, puis toutes les cibles."""
+    sources = {op.src for op in ops}
+    if not any(op.dst in sources for op in ops):
+        return [ops]
+    token = uuid.uuid4().hex[:8]
+    tmp = [os.path.join(os.path.dirname(op.src), f".{os.path.basename(op.src)}.rename-{token}") for op in ops]
+    return [[Rename(op.src, t) for op, t in zip(ops, tmp)],
+            [Rename(t, op.dst) for op, t in zip(ops, tmp)]]
+
+def _by_volume(ops):
+    groups = {}
+    for op in ops:
+        groups.setdefault(os.stat(os.path.dirname(op.src)).st_dev, []).append(op)
+    return list(groups.values())
+
+
+class Journal:
+    """Journal JSONL : plan complet (synchronisé avant toute action), puis marques done / commit."""
+
+    def __init__(self, path):
+        # Un journal par exécution : jamais d'ajout à un plan précédent
+        self.f = open(path, "x", encoding="utf-8")
+        self.lock = threading.Lock()
+        self.unsynced = 0
+
+    def write_plan(self, steps):
+        for step_no, step in enumerate(steps):
+            for op in step:
+                self.f.write(json.dumps({"step": step_no, "src": op.src, "dst": op.dst}, ensure_ascii=False) + "\n")
+        self.sync()
+
+    def done(self, op):
+        with self.lock:
+            self.f.write(json.dumps({"done": op.src}, ensure_ascii=False) + "\n")
+            self.unsynced += 1
+            if self.unsynced >= JOURNAL_SYNC_EVERY:
+                self.sync()
+
+    def sync(self):
+        self.f.flush()
+        os.fsync(self.f.fileno())
+        self.unsynced = 0
+
+    def close(self, committed):
+        if committed:
+            self.f.write(json.dumps({"commit": time.time()}) + "\n")
+        self.sync()
+        self.f.close()
+
+
+def _run_group(ops, journal=None):
+    for op in ops:
+        # Dernière vérification : jamais d'écrasement silencieux
+        if os.path.lexists(op.dst):
+            raise FileExistsError(f"{op.dst} appeared since the plan was made")
+        os.rename(op.src, op.dst)
+        if journal:
+            journal.done(op)
+    return len(ops)
+
+def apply(ops, journal_path):
+    """Exécute le plan ; en cas d'erreur le journal permet rollback()."""
+    steps = _staged(ops)
+    journal = Journal(journal_path)
+    journal.write_plan(steps)
+    committed = False
+    try:
+        for step in steps:
+            groups = _by_volume(step)
+            with ThreadPoolExecutor(max_workers=len(groups) or 1) as pool:
+                for f in [pool.submit(_run_group, g, journal) for g in groups]:
+                    f.result()
+        committed = True
+    finally:
+        journal.close(committed)
+    return len(ops)
+
+
+def rollback(journal_path):
+    """Annule un renommage journalisé (terminé ou interrompu) ; renvoie le nombre de renommages défaits."""
+    steps = {}
+    with open(journal_path, encoding="utf-8") as f:
+        for line in f:
+            try:
+                rec = json.loads(line)
+            except ValueError:
+                break  # dernière ligne tronquée par une interruption
+            if "step" in rec:
+                steps.setdefault(rec["step"], []).append(Rename(rec["src"], rec["dst"]))
+    restored = 0
+    # Ordre inverse des étapes ; l'état du disque fait foi (une marque done peut manquer)
+    for step_no in sorted(steps, reverse=True):
+        reverse = [Rename(op.dst, op.src) for op in steps[step_no]
+                   if os.path.lexists(op.dst) and not os.path.lexists(op.src)]
+        groups = _by_volume(reverse)
+        with ThreadPoolExecutor(max_workers=len(groups) or 1) as pool:
+            restored += sum(pool.map(_run_group, groups))
+    return restored
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="Clean Masters Filename Generator — bulk rename")
+    ap.add_argument("mapping", nargs="?", help="CSV/XLSX/JSON avec les colonnes source et filename")
+    ap.add_argument("--apply", action="store_true", help="effectue les renommages (sinon : plan seulement)")
+    ap.add_argument("--journal", default=None, help="journal de renommage, pour --rollback (défaut : rename-AAAAMMJJ-HHMMSS.journal)")
+    ap.add_argument("--rollback", metavar="JOURNAL", help="annule le renommage enregistré dans JOURNAL")
+    args = ap.parse_args(argv)
+
+    if args.rollback:
+        n = rollback(args.rollback)
+        print(f"{n} renames undone", file=sys.stderr)
+        return 0
+    if not args.mapping:
+        ap.error("mapping file required")
+
+    t0 = time.perf_counter()
+    ops, problems = plan(read_mapping(args.mapping))
+    for src, msg in problems:
+        print(f"{src}\t{msg}", file=sys.stderr)
+    if problems:
+        print(f"{len(problems)} problem(s), nothing renamed", file=sys.stderr)
+        return 1
+    if not args.apply:
+        for op in ops:
+            print(f"{op.src}\t{op.dst}")
+        print(f"{len(ops)} renames planned (dry-run, use --apply)", file=sys.stderr)
+        return 0
+    journal = args.journal or time.strftime("rename-%Y%m%d-%H%M%S.journal")
+    n = apply(ops, journal)
+    elapsed = time.perf_counter() - t0
+    print(f"{n} files renamed in {elapsed:.2f} s, journal: {journal}", file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,114 @@
+"""Audit de conformité d'une arborescence de livraison.
+
+    python scanner.py /mnt/deliveries --workers 8 --report report.csv
+
+Le parcours (os.scandir) se fait dans le processus principal ; les noms sont envoyés
+par lots à un pool de processus qui les passe au parseur. Seuls les fichiers non
+conformes remontent, et le nombre de lots en vol est borné : la mémoire ne dépend
+pas du nombre de fichiers.
+"""
+import argparse, csv, json, os, sys, time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+from name_parser import get_parser
+
+BATCH_SIZE = 2000
+
+
+def walk(root, include_hidden=False):
+    """Générateur (dossier, [noms de fichiers]) par dossier, avec os.scandir."""
+    stack = [root]
+    while stack:
+        path = stack.pop()
+        files = []
+        try:
+            with os.scandir(path) as it:
+                for entry in it:
+                    if not include_hidden and entry.name.startswith("."):
+                        continue
+                    if entry.is_dir(follow_symlinks=False):
+                        stack.append(entry.path)
+                    elif entry.is_file():
+                        files.append(entry.name)
+        except OSError as exc:
+            print(f"skipped {path}: {exc}", file=sys.stderr)
+            continue
+        if files:
+            yield path, files
+
+def batches(root, include_hidden=False, size=BATCH_SIZE):
+    """Regroupe les fichiers en lots [(dossier, nom), …] de taille bornée."""
+    batch = []
+    for path, files in walk(root, include_hidden):
+        for name in files:
+            batch.append((path, name))
+            if len(batch) >= size:
+                yield batch
+                batch = []
+    if batch:
+        yield batch
+
+def check_batch(batch):
+    """Exécuté dans un processus du pool : [(chemin, nom, erreur)] des fichiers non conformes."""
+    parser = get_parser()
+    issues = []
+    for path, name in batch:
+        _, error = parser.parse(name)
+        if error:
+            issues.append((os.path.join(path, name), name, error))
+    return len(batch), issues
+
+def scan(root, workers=None, include_hidden=False):
+    """Générateur (nombre de fichiers vérifiés, problèmes) par lot terminé."""
+    workers = workers or os.cpu_count() or 1
+    if workers == 1:
+        for batch in batches(root, include_hidden):
+            yield check_batch(batch)
+        return
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        in_flight = deque()
+        for batch in batches(root, include_hidden):
+            in_flight.append(pool.submit(check_batch, batch))
+            # Borne les lots en attente (mémoire constante)
+            if len(in_flight) >= workers * 4:
+                yield in_flight.popleft().result()
+        while in_flight:
+            yield in_flight.popleft().result()
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="Clean Masters Filename Generator — delivery conformance scan")
+    ap.add_argument("root", help="dossier de livraison à auditer")
+    ap.add_argument("--workers", type=int, default=None, help="processus de vérification (défaut : nombre de CPU)")
+    ap.add_argument("--report", default="-", help="rapport CSV ou JSONL (.jsonl) ; défaut : stdout en CSV")
+    ap.add_argument("--include-hidden", action="store_true", help="inclut les fichiers et dossiers cachés")
+    args = ap.parse_args(argv)
+
+    jsonl = args.report.endswith(".jsonl")
+    out = sys.stdout if args.report == "-" else open(args.report, "w", encoding="utf-8", newline="")
+    writer = None if jsonl else csv.writer(out)
+    if writer:
+        writer.writerow(["path", "name", "error"])
+    total = bad = 0
+    t0 = time.perf_counter()
+    try:
+        for checked, issues in scan(args.root, args.workers, args.include_hidden):
+            total += checked
+            bad += len(issues)
+            for path, name, error in issues:
+                if writer:
+                    writer.writerow([path, name, error])
+                else:
+                    out.write(json.dumps({"path": path, "name": name, "error": error}, ensure_ascii=False) + "\n")
+    finally:
+        if out is not sys.stdout:
+            out.close()
+    elapsed = time.perf_counter() - t0
+    rate = total / elapsed if elapsed else 0.0
+    print(f"{total} files checked, {bad} non-conforming, {elapsed:.2f} s ({rate:,.0f} files/s)", file=sys.stderr)
+    return 1 if bad else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,172 @@
+"""Index de recherche d'une liste d'entrées (tenu à jour par EntryStore).
+
+- index inversé (TYPE, valeur) → clés d'entrées : filtres par segment et comptes par facette ;
+- mots de description → clés ;
+- index de trigrammes sur le vocabulaire (valeurs de segments et mots, en minuscules) :
+  un terme de recherche est d'abord résolu en mots du vocabulaire qui le contiennent,
+  puis en entrées. Le vocabulaire est bien plus petit que la liste (formats, langues,
+  dates se répètent), l'index reste donc léger même avec 100k entrées.
+"""
+import re
+
+_TERM_SPLIT = re.compile(r"[\s_]+")
+
+
+def _trigrams(token):
+    return {token[i:i + 3] for i in range(len(token) - 2)}
+
+
+class SearchIndex:
+    def __init__(self):
+        self.postings = {}  # (TYPE, valeur) ou ("", mot de description) -> set de clés
+        self.vocab = {}     # jeton en minuscules -> set de clés de postings
+        self.trigrams = {}  # trigramme -> set de jetons
+        self._desc = {}     # clé d'entrée -> mots de description indexés
+
+    @classmethod
+    def build(cls, entries):
+        """Index complet d'une liste, en une passe (le vocabulaire est déduit ensuite des postings)."""
+        index = cls()
+        postings, desc = index.postings, index._desc
+        for e in entries:
+            key = e.key
+            for ref in e.segments:
+                keys = postings.get(ref)
+                if keys is None:
+                    keys = postings[ref] = set()
+                keys.add(key)
+            words = set(e.description.lower().split())
+            if words:
+                desc[key] = words
+                for w in words:
+                    postings.setdefault(("", w), set()).add(key)
+        for ref in postings:
+            token = ref[1].lower()
+            refs = index.vocab.get(token)
+            if refs is None:
+                refs = index.vocab[token] = set()
+                for t in _trigrams(token):
+                    index.trigrams.setdefault(t, set()).add(token)
+            refs.add(ref)
+        return index
+
+    # --- Mise à jour ---
+    def _link(self, ref, key):
+        keys = self.postings.get(ref)
+        if keys is None:
+            keys = self.postings[ref] = set()
+            token = ref[1].lower()
+            refs = self.vocab.get(token)
+            if refs is None:
+                refs = self.vocab[token] = set()
+                for t in _trigrams(token):
+                    self.trigrams.setdefault(t, set()).add(token)
+            refs.add(ref)
+        keys.add(key)
+
+    def _unlink(self, ref, key):
+        keys = self.postings.get(ref)
+        if keys is None:
+            return
+        keys.discard(key)
+        if keys:
+            return
+        del self.postings[ref]
+        token = ref[1].lower()
+        refs = self.vocab[token]
+        refs.discard(ref)
+        if not refs:
+            del self.vocab[token]
+            for t in _trigrams(token):
+                tokens = self.trigrams[t]
+                tokens.discard(token)
+                if not tokens:
+                    del self.trigrams[t]
+
+    def add(self, entry):
+        for ref in entry.segments:
+            self._link(ref, entry.key)
+        self.set_description(entry.key, entry.description)
+
+    def set_description(self, key, description):
+        words = set(description.lower().split())
+        old = self._desc.pop(key, set())
+        for w in old - words:
+            self._unlink(("", w), key)
+        for w in words - old:
+            self._link(("", w), key)
+        if words:
+            self._desc[key] = words
+
+    def remove(self, entry):
+        for ref in entry.segments:
+            self._unlink(ref, entry.key)
+        self.set_description(entry.key, "")
+
+    # --- Requêtes ---
+    def _tokens_containing(self, term):
+        if len(term) < 3:
+            return [t for t in self.vocab if term in t]
+        candidates = None
+        for t in _trigrams(term):
+            tokens = self.trigrams.get(t)
+            if not tokens:
+                return []
+            candidates = set(tokens) if candidates is None else candidates & tokens
+        return [t for t in candidates if term in t]
+
+    def _text_keys(self, text):
+        """Clés des entrées qui contiennent chaque terme (ET entre termes) ; None si pas de texte."""
+        result = None
+        for term in _TERM_SPLIT.split(text.lower()):
+            if not term:
+                continue
+            keys = set()
+            for token in self._tokens_containing(term):
+                for ref in self.vocab[token]:
+                    keys |= self.postings[ref]
+            result = keys if result is None else result & keys
+            if not result:
+                return set()
+        return result
+
+    def _filter_keys(self, filters, skip=None):
+        """Clés satisfaisant les filtres {TYPE: valeurs} (OU dans un type, ET entre types)."""
+        result = None
+        for seg_type, values in filters.items():
+            if seg_type == skip or not values:
+                continue
+            keys = set()
+            for v in values:
+                keys |= self.postings.get((seg_type, v), set())
+            result = keys if result is None else result & keys
+        return result
+
+    @staticmethod
+    def _and(a, b):
+        if a is None:
+            return b
+        return a if b is None else a & b
+
+    def query(self, text="", filters=None):
+        """Clés des entrées correspondantes ; None = aucun critère (toute la liste)."""
+        return self._and(self._text_keys(text), self._filter_keys(filters or {}))
+
+    def facets(self, types, text="", filters=None):
+        """{TYPE: {valeur: nombre d'entrées}} ; pour chaque type, les filtres des autres types s'appliquent."""
+        filters = filters or {}
+        text_keys = self._text_keys(text)
+        by_type = {t: {} for t in types}
+        for (seg_type, value), keys in self.postings.items():
+            if seg_type in by_type:
+                by_type[seg_type][value] = keys
+        out = {}
+        for seg_type in types:
+            scope = self._and(text_keys, self._filter_keys(filters, skip=seg_type))
+            counts = {}
+            for value, keys in by_type[seg_type].items():
+                n = len(keys) if scope is None else len(keys & scope)
+                if n or value in filters.get(seg_type, ()):
+                    counts[value] = n
+            out[seg_type] = dict(sorted(counts.items()))
+        return out
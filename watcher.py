@@ -0,0 +1,338 @@
+"""Validation en continu d'un dossier d'ingest.
+
+    python watcher.py /mnt/ingest --index ingest.sqlite --stats-file stats.json
+
+Chaque fichier arrivé est vérifié contre la nomenclature dès qu'il est stable
+(taille et date inchangées pendant --settle secondes). Les résultats sont écrits
+en JSONL sur stdout. Un index SQLite (chemin, taille, mtime) évite de revalider
+au redémarrage les fichiers déjà vus. inotify est utilisé sous Linux, sinon le
+dossier est parcouru périodiquement.
+"""
+import argparse, ctypes, ctypes.util, json, os, select, sqlite3, struct, sys, time
+
+from name_parser import get_parser
+
+# Constantes inotify (linux/inotify.h)
+IN_MODIFY = 0x002
+IN_CLOSE_WRITE = 0x008
+IN_MOVED_FROM = 0x040
+IN_MOVED_TO = 0x080
+IN_CREATE = 0x100
+IN_DELETE = 0x200
+IN_Q_OVERFLOW = 0x4000
+IN_IGNORED = 0x8000
+IN_ISDIR = 0x40000000
+WATCH_MASK = IN_MODIFY | IN_CLOSE_WRITE | IN_MOVED_FROM | IN_MOVED_TO | IN_CREATE | IN_DELETE
+_EVENT = struct.Struct("iIII")
+
+
+class Index:
+    """Fichiers déjà validés : chemin → (taille, mtime) et résultat."""
+
+    def __init__(self, path):
+        self.db = sqlite3.connect(path)
+        self.db.execute("PRAGMA journal_mode=WAL")
+        self.db.execute("""CREATE TABLE IF NOT EXISTS files (
+            path TEXT PRIMARY KEY, size INTEGER, mtime_ns INTEGER,
+            ok INTEGER, error TEXT, checked REAL)""")
+
+    def unchanged(self, path, size, mtime_ns):
+        row = self.db.execute("SELECT size, mtime_ns FROM files WHERE path = ?", (path,)).fetchone()
+        return row == (size, mtime_ns)
+
+    def record(self, path, size, mtime_ns, error):
+        self.db.execute("INSERT OR REPLACE INTO files VALUES (?, ?, ?, ?, ?, ?)",
+                        (path, size, mtime_ns, error is None, error, time.time()))
+
+    def forget(self, path):
+        """Oublie path et tout ce qui est indexé sous lui (dossier supprimé)."""
+        self.db.execute("DELETE FROM files WHERE path = ?", (path,))
+        self.db.execute("DELETE FROM files WHERE path >= ? AND path < ?", _prefix_range(path))
+
+    def forget_many(self, paths):
+        """Oublie des fichiers précis (un DELETE par clé primaire, en une seule requête préparée)."""
+        self.db.executemany("DELETE FROM files WHERE path = ?", ((p,) for p in paths))
+
+    def paths(self, root):
+        """Chemins indexés sous root."""
+        return [p for (p,) in self.db.execute("SELECT path FROM files WHERE path >= ? AND path < ?",
+                                              _prefix_range(root))]
+
+    def commit(self):
+        self.db.commit()
+
+    def close(self):
+        self.db.commit()
+        self.db.close()
+
+
+def _prefix_range(path):
+    """Bornes [path/, path0) : tout ce qui est sous path, par l'index de clé primaire.
+
+    Comparaison binaire (UTF-8, même ordre que les points de code) : « _ » et « % » n'y sont
+    pas des jokers comme avec LIKE, et la casse compte. « 0 » suit « / » dans l'ordre ASCII.
+    """
+    prefix = os.path.join(path, "")
+    return prefix, prefix[:-1] + chr(ord(prefix[-1]) + 1)
+
+
+def walk_files(root, failed=None):
+    """(chemin, os.stat_result) de tous les fichiers sous root.
+
+    Les dossiers illisibles sont sautés ; si failed est une liste, ils y sont ajoutés.
+    """
+    stack = [root]
+    while stack:
+        path = stack.pop()
+        try:
+            with os.scandir(path) as it:
+                for entry in it:
+                    if entry.name.startswith("."):
+                        continue
+                    if entry.is_dir(follow_symlinks=False):
+                        stack.append(entry.path)
+                    elif entry.is_file():
+                        yield entry.path, entry.stat()
+        except OSError:
+            if failed is not None:
+                failed.append(path)
+            continue
+
+
+class InotifySource:
+    """Événements inotify récursifs (Linux), lus via ctypes."""
+
+    mode = "inotify"
+
+    def __init__(self, root):
+        libc = ctypes.CDLL(ctypes.util.find_library("c") or "libc.so.6", use_errno=True)
+        self._add_watch = libc.inotify_add_watch
+        self.fd = libc.inotify_init1(os.O_NONBLOCK | os.O_CLOEXEC)
+        if self.fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1 failed")
+        self.dirs = {}
+        self.add_tree(root)
+
+    def add_tree(self, root):
+        for dirpath, dirnames, _ in os.walk(root):
+            dirnames[:] = [d for d in dirnames if not d.startswith(".")]
+            wd = self._add_watch(self.fd, os.fsencode(dirpath), WATCH_MASK)
+            if wd >= 0:
+                self.dirs[wd] = dirpath
+
+    def poll(self, timeout):
+        """→ (fichiers modifiés, fichiers supprimés, rescan nécessaire)."""
+        changed, removed, rescan = set(), set(), False
+        if not select.select([self.fd], [], [], timeout)[0]:
+            return changed, removed, rescan
+        try:
+            data = os.read(self.fd, 1 << 16)
+        except BlockingIOError:
+            return changed, removed, rescan
+        pos = 0
+        while pos < len(data):
+            wd, mask, _, length = _EVENT.unpack_from(data, pos)
+            name = data[pos + _EVENT.size:pos + _EVENT.size + length].rstrip(b"\0")
+            pos += _EVENT.size + length
+            if mask & IN_Q_OVERFLOW:
+                rescan = True
+                continue
+            if mask & IN_IGNORED:
+                self.dirs.pop(wd, None)
+                continue
+            parent = self.dirs.get(wd)
+            if parent is None or not name or name.startswith(b"."):
+                continue
+            path = os.path.join(parent, os.fsdecode(name))
+            if mask & IN_ISDIR:
+                if mask & (IN_CREATE | IN_MOVED_TO):
+                    # Nouveau dossier : on le surveille et on reprend ce qu'il contient déjà
+                    self.add_tree(path)
+                    changed.update(p for p, _ in walk_files(path))
+                elif mask & (IN_DELETE | IN_MOVED_FROM):
+                    removed.add(path)
+            elif mask & (IN_DELETE | IN_MOVED_FROM):
+                removed.add(path)
+            else:
+                changed.add(path)
+        return changed, removed, rescan
+
+    def close(self):
+        os.close(self.fd)
+
+
+class PollingSource:
+    """Repli sans inotify : l'index filtre les fichiers inchangés à chaque parcours."""
+
+    mode = "polling"
+
+    def __init__(self, root, interval):
+        self.root = root
+        self.interval = interval
+        self.next_walk = time.monotonic() + interval
+
+    def poll(self, timeout):
+        now = time.monotonic()
+        if now < self.next_walk:
+            time.sleep(min(timeout, self.next_walk - now))
+            return set(), set(), False
+        self.next_walk = time.monotonic() + self.interval
+        return set(), set(), True
+
+    def close(self):
+        pass
+
+
+class Validator:
+    """Suit les fichiers en cours d'arrivée et les valide une fois stables."""
+
+    def __init__(self, index, out, settle):
+        self.index = index
+        self.out = out
+        self.settle = settle
+        self.pending = {}  # chemin -> [vu à (time), taille, mtime_ns, dernier changement (monotonic)]
+        self.counters = {"validated": 0, "ok": 0, "non_conforming": 0,
+                         "latency_last_s": 0.0, "latency_max_s": 0.0, "latency_total_s": 0.0}
+
+    def touch(self, path, st=None):
+        try:
+            st = st or os.stat(path)
+        except OSError:
+            self.pending.pop(path, None)
+            return
+        if self.index.unchanged(path, st.st_size, st.st_mtime_ns):
+            return
+        rec = self.pending.get(path)
+        if rec is None:
+            self.pending[path] = [time.time(), st.st_size, st.st_mtime_ns, time.monotonic()]
+        elif (rec[1], rec[2]) != (st.st_size, st.st_mtime_ns):
+            rec[1:] = [st.st_size, st.st_mtime_ns, time.monotonic()]
+
+    def remove(self, path):
+        self.pending.pop(path, None)
+        prefix = path + os.sep
+        for p in [p for p in self.pending if p.startswith(prefix)]:
+            del self.pending[p]
+        self.index.forget(path)
+
+    def reconcile(self, root):
+        """Parcours complet : seuls les fichiers absents de l'index ou modifiés sont mis en attente.
+
+        Les fichiers indexés qui n'existent plus sont oubliés (le mode polling ne voit pas les suppressions),
+        sauf sous un dossier dont la lecture a échoué (démonté, droits) : son contenu est inconnu.
+        """
+        seen, failed = set(), []
+        for path, st in walk_files(root, failed):
+            seen.add(path)
+            self.touch(path, st)
+        if not os.path.isdir(root):  # dossier démonté : ne rien oublier
+            return
+        unknown = tuple(os.path.join(d, "") for d in failed)
+        gone = [p for p in self.index.paths(root) if p not in seen and not p.startswith(unknown)]
+        for path in gone:
+            self.pending.pop(path, None)
+        if gone:
+            self.index.forget_many(gone)
+            self.index.commit()
+
+    def process_settled(self):
+        now = time.monotonic()
+        done = False
+        for path, rec in list(self.pending.items()):
+            if now - rec[3] < self.settle:
+                continue
+            try:
+                st = os.stat(path)
+            except OSError:
+                del self.pending[path]
+                continue
+            if (st.st_size, st.st_mtime_ns) != (rec[1], rec[2]):
+                # Encore en cours d'écriture
+                rec[1:] = [st.st_size, st.st_mtime_ns, now]
+                continue
+            del self.pending[path]
+            self.validate(path, st, rec[0])
+            done = True
+        if done:
+            self.index.commit()
+
+    def validate(self, path, st, seen_at):
+        # get_parser() suit config.ini : une liste modifiée s'applique sans relancer le daemon
+        _, error = get_parser().parse(os.path.basename(path))
+        self.index.record(path, st.st_size, st.st_mtime_ns, error)
+        latency = time.time() - seen_at
+        c = self.counters
+        c["validated"] += 1
+        c["ok" if error is None else "non_conforming"] += 1
+        c["latency_last_s"] = latency
+        c["latency_max_s"] = max(c["latency_max_s"], latency)
+        c["latency_total_s"] += latency
+        self.out.write(json.dumps({"path": path, "ok": error is None, "error": error,
+                                   "latency_s": round(latency, 3)}, ensure_ascii=False) + "\n")
+        self.out.flush()
+
+    def stats(self):
+        c = dict(self.counters)
+        c["backlog"] = len(self.pending)
+        c["latency_avg_s"] = c.pop("latency_total_s") / c["validated"] if c["validated"] else 0.0
+        return c
+
+
+def watch(root, index_path, settle=2.0, poll_interval=10.0, polling=False,
+          stats_file=None, stats_every=30.0, out=sys.stdout):
+    index = Index(index_path)
+    validator = Validator(index, out, settle)
+    source = None
+    if not polling and sys.platform.startswith("linux"):
+        try:
+            source = InotifySource(root)
+        except (OSError, AttributeError) as exc:
+            print(f"inotify unavailable ({exc}), falling back to polling", file=sys.stderr)
+    if source is None:
+        source = PollingSource(root, poll_interval)
+    # Au démarrage : seul ce qui a changé depuis le dernier arrêt est revalidé
+    validator.reconcile(root)
+    next_stats = time.monotonic() + stats_every
+    try:
+        while True:
+            changed, removed, rescan = source.poll(timeout=min(settle, 1.0))
+            for path in removed:
+                validator.remove(path)
+            for path in changed:
+                validator.touch(path)
+            if rescan:
+                validator.reconcile(root)
+            validator.process_settled()
+            if time.monotonic() >= next_stats:
+                next_stats = time.monotonic() + stats_every
+                stats = dict(validator.stats(), mode=source.mode)
+                print("stats " + json.dumps(stats), file=sys.stderr)
+                if stats_file:
+                    tmp = stats_file + ".tmp"
+                    with open(tmp, "w", encoding="utf-8") as f:
+                        json.dump(stats, f)
+                    os.replace(tmp, stats_file)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        source.close()
+        index.close()
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="Clean Masters Filename Generator — watch-folder validator")
+    ap.add_argument("root", help="dossier d'ingest à surveiller")
+    ap.add_argument("--index", default="watch_index.sqlite", help="index SQLite des fichiers déjà validés")
+    ap.add_argument("--settle", type=float, default=2.0, help="secondes sans changement avant validation")
+    ap.add_argument("--polling", action="store_true", help="force le mode parcours périodique")
+    ap.add_argument("--poll-interval", type=float, default=10.0, help="intervalle de parcours en mode polling")
+    ap.add_argument("--stats-file", help="fichier JSON des compteurs (latence, backlog…), réécrit périodiquement")
+    ap.add_argument("--stats-every", type=float, default=30.0)
+    args = ap.parse_args(argv)
+    watch(args.root, args.index, args.settle, args.poll_interval, args.polling,
+          args.stats_file, args.stats_every)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())